@@ -15,6 +15,9 @@ file(MAKE_DIRECTORY ${PROJECT_BINARY_DIR}/include/generated)
 set(GENERATED_DTS_BOARD_UNFIXED_H ${PROJECT_BINARY_DIR}/include/generated/generated_dts_board_unfixed.h)
 set(GENERATED_DTS_BOARD_CONF      ${PROJECT_BINARY_DIR}/include/generated/generated_dts_board.conf)
 set(DTS_POST_CPP                  ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.tmp)
+# The edtlib.EDT built by gen_defines.py, loaded by other scripts that need
+# the devicetree (Kconfig functions, west sign, ...) instead of parsing it again
+set(EDT_PICKLE                    ${PROJECT_BINARY_DIR}/edt.pickle)
 
 set_ifndef(DTS_SOURCE ${BOARD_DIR}/${BOARD}.dts)
 
@@ -116,29 +119,169 @@ if(SUPPORTS_DTS)
   # preprocessor, and it seems to be including all kinds of
   # directories with who-knows how many header files.
 
-  # Run the C preprocessor on an empty C source file that has one or
-  # more DTS source files -include'd into it to create the
-  # intermediary file *.dts.pre.tmp. Also, generate a dependency file
-  # so that changes to DT sources are detected.
-  execute_process(
-    COMMAND ${CMAKE_C_COMPILER}
-    -x assembler-with-cpp
-    -nostdinc
-    ${DTS_ROOT_SYSTEM_INCLUDE_DIRS}
-    ${DTC_INCLUDE_FLAG_FOR_DTS}  # include the DTS source and overlays
-    ${NOSYSDEF_CFLAG}
-    -D__DTS__
-    -P
-    -E   # Stop after preprocessing
-    -MD  # Generate a dependency file as a side-effect
-    -MF ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.d
-    -o  ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.tmp
-    ${ZEPHYR_BASE}/misc/empty_file.c
-    WORKING_DIRECTORY ${APPLICATION_SOURCE_DIR}
-    RESULT_VARIABLE ret
+  # If DTS_SHARED_DIR is set (sanitycheck --share-dts does this), the
+  # outputs below are shared by all builds with the same devicetree sources
+  # and settings, which is typically every build for a board that has no
+  # devicetree overlays. The first configure generates them and saves a copy
+  # in a subdirectory of DTS_SHARED_DIR. Later configures copy them from
+  # there, as long as no devicetree source, binding or devicetree script is
+  # newer than the copy.
+  set(dts_shared_files
+    ${BOARD}.dts.pre.tmp
+    ${BOARD}.dts.pre.d
+    ${BOARD}.dts_compiled
+    edt.pickle
+    include/generated/generated_dts_board.conf
+    include/generated/generated_dts_board_unfixed.h
+    )
+  set(dts_shared_dir "")
+  set(dts_shared_up_to_date FALSE)
+  if(DTS_SHARED_DIR AND NOT DTC_OVERLAY_FILE AND NOT shield_dts_files)
+    string(SHA256 dts_shared_key
+      "${CMAKE_C_COMPILER};${DTS_ROOT_SYSTEM_INCLUDE_DIRS};${DTC_INCLUDE_FLAG_FOR_DTS};${NOSYSDEF_CFLAG};${DTC};${EXTRA_DTC_FLAGS};${DTS_ROOT_BINDINGS};${PYTHON_EXECUTABLE}"
+      )
+    string(SUBSTRING ${dts_shared_key} 0 16 dts_shared_key)
+    set(dts_shared_dir ${DTS_SHARED_DIR}/${BOARD}-${dts_shared_key})
+
+    # Concurrent configures for the same board wait for the first one to
+    # generate the outputs
+    file(MAKE_DIRECTORY ${dts_shared_dir})
+    file(LOCK ${dts_shared_dir} DIRECTORY)
+
+    if(EXISTS ${dts_shared_dir}/stamp)
+      file(READ ${dts_shared_dir}/${BOARD}.dts.pre.d dts_shared_deps)
+      string(REPLACE "\\\n" " " dts_shared_deps "${dts_shared_deps}")
+      string(FIND "${dts_shared_deps}" ": " index)
+      math(EXPR index "${index} + 2")
+      string(SUBSTRING "${dts_shared_deps}" ${index} -1 dts_shared_deps)
+      separate_arguments(dts_shared_deps UNIX_COMMAND "${dts_shared_deps}")
+
+      # Directories are included, to detect removed bindings
+      list(TRANSFORM DTS_ROOT_BINDINGS APPEND "/*" OUTPUT_VARIABLE globs)
+      file(GLOB_RECURSE dts_shared_bindings LIST_DIRECTORIES true ${globs})
+      file(GLOB dts_shared_scripts ${ZEPHYR_BASE}/scripts/dts/*.py)
+
+      set(dts_shared_up_to_date TRUE)
+      foreach(dep
+          ${dts_shared_deps}
+          ${DTS_ROOT_BINDINGS}
+          ${dts_shared_bindings}
+          ${dts_shared_scripts}
+          )
+        if(${dep} IS_NEWER_THAN ${dts_shared_dir}/stamp)
+          set(dts_shared_up_to_date FALSE)
+          break()
+        endif()
+      endforeach()
+    endif()
+  endif()
+
+  if(dts_shared_up_to_date)
+    message(STATUS "Using devicetree outputs from ${dts_shared_dir}")
+    foreach(file ${dts_shared_files})
+      configure_file(${dts_shared_dir}/${file} ${PROJECT_BINARY_DIR}/${file} COPYONLY)
+    endforeach()
+  else()
+    if(dts_shared_dir)
+      # Any input modified from here on makes the copy out of date
+      file(REMOVE ${dts_shared_dir}/stamp)
+      file(TOUCH ${dts_shared_dir}/stamp.tmp)
+    endif()
+
+    # Run the C preprocessor on an empty C source file that has one or
+    # more DTS source files -include'd into it to create the
+    # intermediary file *.dts.pre.tmp. Also, generate a dependency file
+    # so that changes to DT sources are detected.
+    execute_process(
+      COMMAND ${CMAKE_C_COMPILER}
+      -x assembler-with-cpp
+      -nostdinc
+      ${DTS_ROOT_SYSTEM_INCLUDE_DIRS}
+      ${DTC_INCLUDE_FLAG_FOR_DTS}  # include the DTS source and overlays
+      ${NOSYSDEF_CFLAG}
+      -D__DTS__
+      -P
+      -E   # Stop after preprocessing
+      -MD  # Generate a dependency file as a side-effect
+      -MF ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.d
+      -o  ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.tmp
+      ${ZEPHYR_BASE}/misc/empty_file.c
+      WORKING_DIRECTORY ${APPLICATION_SOURCE_DIR}
+      RESULT_VARIABLE ret
+      )
+    if(NOT "${ret}" STREQUAL "0")
+      message(FATAL_ERROR "command failed with return code: ${ret}")
+    endif()
+
+    # Run the DTC on *.dts.pre.tmp to create the intermediary file *.dts_compiled
+
+    set(DTC_WARN_UNIT_ADDR_IF_ENABLED "")
+    check_dtc_flag("-Wunique_unit_address_if_enabled" check)
+    if (check)
+      set(DTC_WARN_UNIT_ADDR_IF_ENABLED "-Wunique_unit_address_if_enabled")
+    endif()
+    set(DTC_NO_WARN_UNIT_ADDR "")
+    check_dtc_flag("-Wno-unique_unit_address" check)
+    if (check)
+      set(DTC_NO_WARN_UNIT_ADDR "-Wno-unique_unit_address")
+    endif()
+    execute_process(
+      COMMAND ${DTC}
+      -O dts
+      -o ${BOARD}.dts_compiled
+      -b 0
+      -E unit_address_vs_reg
+      ${DTC_NO_WARN_UNIT_ADDR}
+      ${DTC_WARN_UNIT_ADDR_IF_ENABLED}
+      ${EXTRA_DTC_FLAGS} # User settable
+      ${BOARD}.dts.pre.tmp
+      WORKING_DIRECTORY ${PROJECT_BINARY_DIR}
+      RESULT_VARIABLE ret
+      )
+    if(NOT "${ret}" STREQUAL "0")
+      message(FATAL_ERROR "command failed with return code: ${ret}")
+    endif()
+
+    #
+    # Run gen_defines.py to create a .conf file and a header file
+    #
+
+    set(CMD_NEW_EXTRACT ${PYTHON_EXECUTABLE} ${ZEPHYR_BASE}/scripts/dts/gen_defines.py
+    --dts ${BOARD}.dts.pre.tmp
+    --bindings-dirs ${DTS_ROOT_BINDINGS}
+    --conf-out ${GENERATED_DTS_BOARD_CONF}
+    --header-out ${GENERATED_DTS_BOARD_UNFIXED_H}
+    --edt-pickle-out ${EDT_PICKLE}
     )
-  if(NOT "${ret}" STREQUAL "0")
-    message(FATAL_ERROR "command failed with return code: ${ret}")
+
+    execute_process(
+      COMMAND ${CMD_NEW_EXTRACT}
+      WORKING_DIRECTORY ${PROJECT_BINARY_DIR}
+      RESULT_VARIABLE ret
+      )
+    if(NOT "${ret}" STREQUAL "0")
+      message(FATAL_ERROR "new extractor failed with return code: ${ret}")
+    endif()
+
+    if(dts_shared_dir)
+      file(COPY
+        ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.tmp
+        ${PROJECT_BINARY_DIR}/${BOARD}.dts.pre.d
+        ${PROJECT_BINARY_DIR}/${BOARD}.dts_compiled
+        ${EDT_PICKLE}
+        DESTINATION ${dts_shared_dir}
+        )
+      file(COPY
+        ${GENERATED_DTS_BOARD_CONF}
+        ${GENERATED_DTS_BOARD_UNFIXED_H}
+        DESTINATION ${dts_shared_dir}/include/generated
+        )
+      file(RENAME ${dts_shared_dir}/stamp.tmp ${dts_shared_dir}/stamp)
+    endif()
+  endif()
+
+  if(dts_shared_dir)
+    file(LOCK ${dts_shared_dir} DIRECTORY RELEASE)
   endif()
 
   # Parse the generated dependency file to find the DT sources that
@@ -154,55 +297,6 @@ if(SUPPORTS_DTS)
     ${include_files}
     )
 
-  # Run the DTC on *.dts.pre.tmp to create the intermediary file *.dts_compiled
-
-  set(DTC_WARN_UNIT_ADDR_IF_ENABLED "")
-  check_dtc_flag("-Wunique_unit_address_if_enabled" check)
-  if (check)
-    set(DTC_WARN_UNIT_ADDR_IF_ENABLED "-Wunique_unit_address_if_enabled")
-  endif()
-  set(DTC_NO_WARN_UNIT_ADDR "")
-  check_dtc_flag("-Wno-unique_unit_address" check)
-  if (check)
-    set(DTC_NO_WARN_UNIT_ADDR "-Wno-unique_unit_address")
-  endif()
-  execute_process(
-    COMMAND ${DTC}
-    -O dts
-    -o ${BOARD}.dts_compiled
-    -b 0
-    -E unit_address_vs_reg
-    ${DTC_NO_WARN_UNIT_ADDR}
-    ${DTC_WARN_UNIT_ADDR_IF_ENABLED}
-    ${EXTRA_DTC_FLAGS} # User settable
-    ${BOARD}.dts.pre.tmp
-    WORKING_DIRECTORY ${PROJECT_BINARY_DIR}
-    RESULT_VARIABLE ret
-    )
-  if(NOT "${ret}" STREQUAL "0")
-    message(FATAL_ERROR "command failed with return code: ${ret}")
-  endif()
-
-  #
-  # Run gen_defines.py to create a .conf file and a header file
-  #
-
-  set(CMD_NEW_EXTRACT ${PYTHON_EXECUTABLE} ${ZEPHYR_BASE}/scripts/dts/gen_defines.py
-  --dts ${BOARD}.dts.pre.tmp
-  --bindings-dirs ${DTS_ROOT_BINDINGS}
-  --conf-out ${GENERATED_DTS_BOARD_CONF}
-  --header-out ${GENERATED_DTS_BOARD_UNFIXED_H}
-  )
-
-  execute_process(
-    COMMAND ${CMD_NEW_EXTRACT}
-    WORKING_DIRECTORY ${PROJECT_BINARY_DIR}
-    RESULT_VARIABLE ret
-    )
-  if(NOT "${ret}" STREQUAL "0")
-    message(FATAL_ERROR "new extractor failed with return code: ${ret}")
-  endif()
-
 else()
   file(WRITE ${GENERATED_DTS_BOARD_UNFIXED_H} "/* WARNING. THIS FILE IS AUTO-GENERATED. DO NOT MODIFY! */")
 endif(SUPPORTS_DTS)
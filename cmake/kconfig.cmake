@@ -48,6 +48,20 @@ set(ENV{ARCH_DIR}   ${ARCH_DIR})
 set(ENV{GENERATED_DTS_BOARD_CONF} ${GENERATED_DTS_BOARD_CONF})
 set(ENV{DTS_POST_CPP} ${DTS_POST_CPP})
 set(ENV{DTS_ROOT_BINDINGS} "${DTS_ROOT_BINDINGS}")
+set(ENV{EDT_PICKLE} ${EDT_PICKLE})
+
+# Cache the parsed Kconfig tree for the next configure and the Kconfig tools
+# that load it (kconfig.py and hardenconfig.py) if ZEPHYR_KCONFIG_TREE_CACHE is
+# set. This makes the first configure of a build directory slower, see
+# scripts/kconfig/kconfigcache.py.
+if("$ENV{ZEPHYR_KCONFIG_TREE_CACHE}")
+  set(ENV{KCONFIG_TREE_CACHE} ${PROJECT_BINARY_DIR}/kconfig/tree.pickle)
+  set(KCONFIG_TREE_CACHE_ENV_FOR_hardenconfig
+    KCONFIG_TREE_CACHE=$ENV{KCONFIG_TREE_CACHE}
+    )
+else()
+  unset(ENV{KCONFIG_TREE_CACHE})
+endif()
 
 # Allow out-of-tree users to add their own Kconfig python frontend
 # targets by appending targets to the CMake list
@@ -94,6 +108,8 @@ foreach(kconfig_target
     GENERATED_DTS_BOARD_CONF=${GENERATED_DTS_BOARD_CONF}
     DTS_POST_CPP=${DTS_POST_CPP}
     DTS_ROOT_BINDINGS=${DTS_ROOT_BINDINGS}
+    EDT_PICKLE=${EDT_PICKLE}
+    ${KCONFIG_TREE_CACHE_ENV_FOR_${kconfig_target}}
     ${PYTHON_EXECUTABLE}
     ${EXTRA_KCONFIG_TARGET_COMMAND_FOR_${kconfig_target}}
     ${KCONFIG_ROOT}
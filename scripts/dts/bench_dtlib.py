@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Microbenchmark for the dtlib tokenizer and parser
+
+Tokenizes and parses preprocessed devicetree files (e.g. the
+zephyr/<BOARD>.dts.pre.tmp files in a build directory) and reports the time
+spent tokenizing, the token throughput, and the time for a full dtlib.DT()
+parse.
+
+If --baseline is given, it is the path to another dtlib.py (e.g. one checked
+out with 'git show <rev>:scripts/dts/dtlib.py'). Its full parse time is
+reported as well, and the trees are checked to be identical.
+
+Usage:
+    python3 scripts/dts/bench_dtlib.py build/zephyr/*.dts.pre.tmp
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dtlib
+
+
+def load_baseline(path):
+    # Imports the dtlib.py at 'path' under a different module name
+
+    spec = importlib.util.spec_from_file_location("baseline_dtlib", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def tokenize(filename):
+    # Runs just the tokenizer of dtlib.DT on 'filename'. Returns the number
+    # of tokens.
+
+    dt = dtlib.DT.__new__(dtlib.DT)
+    dt.filename = filename
+    dt._include_path = []
+    with open(filename, encoding="utf-8") as f:
+        dt._file_contents = f.read()
+    dt._filestack = []
+    dt._lineno = 1
+    dt._tok_idx = None
+    dt._tokenize()
+
+    return len(dt._tok_ids)
+
+
+def time_fn(fn, filenames, repeat):
+    # Returns (<result of the last call>, <seconds per pass over 'filenames'>)
+    # for the best of 'repeat' passes
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = [fn(filename) for filename in filenames]
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return res, best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dts", nargs="+",
+                        help="Preprocessed devicetree files to parse")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Report the best of this many passes (default 5)")
+    parser.add_argument("--baseline", metavar="DTLIB_PY",
+                        help="dtlib.py to compare the parse time against")
+    args = parser.parse_args()
+
+    n_tokens, tok_time = time_fn(tokenize, args.dts, args.repeat)
+    n_tokens = sum(n_tokens)
+    print("{} files, {} tokens".format(len(args.dts), n_tokens))
+    print("{:<10} {:10.3f} s {:12.0f} tokens/s"
+          .format("tokenize", tok_time, n_tokens/tok_time))
+
+    dts, parse_time = time_fn(dtlib.DT, args.dts, args.repeat)
+    print("{:<10} {:10.3f} s".format("parse", parse_time))
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        baseline_dts, baseline_time = \
+            time_fn(baseline.DT, args.dts, args.repeat)
+        print("{:<10} {:10.3f} s".format("baseline", baseline_time))
+        print("speedup: {:.2f}x".format(baseline_time/parse_time))
+
+        for filename, dt, baseline_dt in zip(args.dts, dts, baseline_dts):
+            if str(dt) != str(baseline_dt):
+                sys.exit("error: {} parses differently than with the "
+                         "baseline".format(filename))
+
+
+if __name__ == "__main__":
+    main()
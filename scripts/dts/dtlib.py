@@ -96,18 +96,26 @@ class DT:
         with open(filename, encoding="utf-8") as f:
             self._file_contents = f.read()
 
-        self._tok_i = self._tok_end_i = 0
+        self._tok_i = 0
         self._filestack = []
 
         self.alias2node = {}
 
-        self._lexer_state = _DEFAULT
-        self._saved_token = None
-
         self._lineno = 1
 
+        # Index of the next token for the parser. None while tokenizing.
+        self._tok_idx = None
+        self._tokenize()
+
+        self._tok_idx = 0
+        self._peeked = False
         self._parse_dt()
 
+        # The tokens aren't needed anymore
+        del self._tok_ids, self._tok_vals, self._tok_lines, \
+            self._tok_starts, self._tok_files, self._tok_sources
+        self._tok_idx = None
+
         self._register_phandles()
         self._fixup_props()
         self._register_aliases()
@@ -213,28 +221,28 @@ class DT:
         self.root = None
 
         while True:
-            tok = self._next_token()
+            tok_id, tok_val = self._next_token()
 
-            if tok.val == "/":
+            if tok_val == "/":
                 # '/ { ... };', the root node
                 if not self.root:
                     self.root = Node(name="/", parent=None, dt=self)
                 self._parse_node(self.root)
 
-            elif tok.id in (_T_LABEL, _T_REF):
+            elif tok_id in (_T_LABEL, _T_REF):
                 # '&foo { ... };' or 'label: &foo { ... };'. The C tools only
                 # support a single label here too.
 
-                if tok.id is _T_LABEL:
-                    label = tok.val
-                    tok = self._next_token()
-                    if tok.id is not _T_REF:
+                if tok_id is _T_LABEL:
+                    label = tok_val
+                    tok_id, tok_val = self._next_token()
+                    if tok_id is not _T_REF:
                         self._parse_error("expected label reference (&foo)")
                 else:
                     label = None
 
                 try:
-                    node = self._ref2node(tok.val)
+                    node = self._ref2node(tok_val)
                 except DTError as e:
                     self._parse_error(e)
                 node = self._parse_node(node)
@@ -242,15 +250,15 @@ class DT:
                 if label:
                     _append_no_dup(node.labels, label)
 
-            elif tok.id is _T_DEL_NODE:
+            elif tok_id is _T_DEL_NODE:
                 self._next_ref2node()._del()
                 self._expect_token(";")
 
-            elif tok.id is _T_OMIT_IF_NO_REF:
+            elif tok_id is _T_OMIT_IF_NO_REF:
                 self._next_ref2node()._omit_if_no_ref = True
                 self._expect_token(";")
 
-            elif tok.id is _T_EOF:
+            elif tok_id is _T_EOF:
                 if not self.root:
                     self._parse_error("no root node defined")
                 return
@@ -264,12 +272,12 @@ class DT:
 
         has_dts_v1 = False
 
-        while self._peek_token().id is _T_DTS_V1:
+        while self._peek_id() is _T_DTS_V1:
             has_dts_v1 = True
             self._next_token()
             self._expect_token(";")
             # /plugin/ always comes after /dts-v1/
-            if self._peek_token().id is _T_PLUGIN:
+            if self._peek_id() is _T_PLUGIN:
                 self._parse_error("/plugin/ is not supported")
 
         if not has_dts_v1:
@@ -282,10 +290,10 @@ class DT:
         while True:
             # Labels before /memreserve/
             labels = []
-            while self._peek_token().id is _T_LABEL:
-                _append_no_dup(labels, self._next_token().val)
+            while self._peek_id() is _T_LABEL:
+                _append_no_dup(labels, self._next_token()[1])
 
-            if self._peek_token().id is _T_MEMRESERVE:
+            if self._peek_id() is _T_MEMRESERVE:
                 self._next_token()
                 self.memreserves.append(
                     (labels, self._eval_prim(), self._eval_prim()))
@@ -303,19 +311,19 @@ class DT:
         self._expect_token("{")
         while True:
             labels, omit_if_no_ref = self._parse_propnode_labels()
-            tok = self._next_token()
+            tok_id, tok_val = self._next_token()
 
-            if tok.id is _T_PROPNODENAME:
-                if self._peek_token().val == "{":
+            if tok_id is _T_PROPNODENAME:
+                if self._peek_val() == "{":
                     # '<tok> { ...', expect node
 
-                    if tok.val.count("@") > 1:
+                    if tok_val.count("@") > 1:
                         self._parse_error("multiple '@' in node name")
 
                     # Fetch the existing node if it already exists. This
                     # happens when overriding nodes.
-                    child = node.nodes.get(tok.val) or \
-                        Node(name=tok.val, parent=node, dt=self)
+                    child = node.nodes.get(tok_val) or \
+                        Node(name=tok_val, parent=node, dt=self)
 
                     for label in labels:
                         _append_no_dup(child.labels, label)
@@ -333,7 +341,7 @@ class DT:
                         self._parse_error(
                             "/omit-if-no-ref/ can only be used on nodes")
 
-                    prop = node._get_prop(tok.val)
+                    prop = node._get_prop(tok_val)
 
                     if self._check_token("="):
                         self._parse_assignment(prop)
@@ -344,22 +352,22 @@ class DT:
                     for label in labels:
                         _append_no_dup(prop.labels, label)
 
-            elif tok.id is _T_DEL_NODE:
-                tok2 = self._next_token()
-                if tok2.id is not _T_PROPNODENAME:
+            elif tok_id is _T_DEL_NODE:
+                tok2_id, tok2_val = self._next_token()
+                if tok2_id is not _T_PROPNODENAME:
                     self._parse_error("expected node name")
-                if tok2.val in node.nodes:
-                    node.nodes[tok2.val]._del()
+                if tok2_val in node.nodes:
+                    node.nodes[tok2_val]._del()
                 self._expect_token(";")
 
-            elif tok.id is _T_DEL_PROP:
-                tok2 = self._next_token()
-                if tok2.id is not _T_PROPNODENAME:
+            elif tok_id is _T_DEL_PROP:
+                tok2_id, tok2_val = self._next_token()
+                if tok2_id is not _T_PROPNODENAME:
                     self._parse_error("expected property name")
-                node.props.pop(tok2.val, None)
+                node.props.pop(tok2_val, None)
                 self._expect_token(";")
 
-            elif tok.val == "}":
+            elif tok_val == "}":
                 self._expect_token(";")
                 return node
 
@@ -374,12 +382,12 @@ class DT:
         labels = []
         omit_if_no_ref = False
         while True:
-            tok = self._peek_token()
-            if tok.id is _T_LABEL:
-                _append_no_dup(labels, tok.val)
-            elif tok.id is _T_OMIT_IF_NO_REF:
+            tok_id = self._peek_id()
+            if tok_id is _T_LABEL:
+                _append_no_dup(labels, self._peek_val())
+            elif tok_id is _T_OMIT_IF_NO_REF:
                 omit_if_no_ref = True
-            elif (labels or omit_if_no_ref) and tok.id is not _T_PROPNODENAME:
+            elif (labels or omit_if_no_ref) and tok_id is not _T_PROPNODENAME:
                 # Got something like 'foo: bar: }'
                 self._parse_error("expected node or property name")
             else:
@@ -402,29 +410,29 @@ class DT:
             # Parse labels before the value (e.g., '..., label: < 0 >')
             self._parse_value_labels(prop)
 
-            tok = self._next_token()
+            tok_id, tok_val = self._next_token()
 
-            if tok.val == "<":
+            if tok_val == "<":
                 self._parse_cells(prop, 4)
 
-            elif tok.id is _T_BITS:
+            elif tok_id is _T_BITS:
                 n_bits = self._expect_num()
                 if n_bits not in {8, 16, 32, 64}:
                     self._parse_error("expected 8, 16, 32, or 64")
                 self._expect_token("<")
                 self._parse_cells(prop, n_bits//8)
 
-            elif tok.val == "[":
+            elif tok_val == "[":
                 self._parse_bytes(prop)
 
-            elif tok.id is _T_STRING:
+            elif tok_id is _T_STRING:
                 prop._add_marker(_TYPE_STRING)
-                prop.value += self._unescape(tok.val.encode("utf-8")) + b"\0"
+                prop.value += self._unescape(tok_val.encode("utf-8")) + b"\0"
 
-            elif tok.id is _T_REF:
-                prop._add_marker(_REF_PATH, tok.val)
+            elif tok_id is _T_REF:
+                prop._add_marker(_REF_PATH, tok_val)
 
-            elif tok.id is _T_INCBIN:
+            elif tok_id is _T_INCBIN:
                 self._parse_incbin(prop)
 
             else:
@@ -433,10 +441,10 @@ class DT:
             # Parse labels after the value (e.g., '< 0 > label:, ...')
             self._parse_value_labels(prop)
 
-            tok = self._next_token()
-            if tok.val == ";":
+            tok_val = self._next_token()[1]
+            if tok_val == ";":
                 return
-            if tok.val == ",":
+            if tok_val == ",":
                 continue
             self._parse_error("expected ';' or ','")
 
@@ -446,16 +454,16 @@ class DT:
         prop._add_marker(_N_BYTES_TO_TYPE[n_bytes])
 
         while True:
-            tok = self._peek_token()
-            if tok.id is _T_REF:
-                self._next_token()
+            tok_id = self._peek_id()
+            if tok_id is _T_REF:
+                tok_val = self._next_token()[1]
                 if n_bytes != 4:
                     self._parse_error("phandle references are only allowed in "
                                       "arrays with 32-bit elements")
-                prop._add_marker(_REF_PHANDLE, tok.val)
+                prop._add_marker(_REF_PHANDLE, tok_val)
 
-            elif tok.id is _T_LABEL:
-                prop._add_marker(_REF_LABEL, tok.val)
+            elif tok_id is _T_LABEL:
+                prop._add_marker(_REF_LABEL, self._peek_val())
                 self._next_token()
 
             elif self._check_token(">"):
@@ -480,14 +488,14 @@ class DT:
         prop._add_marker(_TYPE_UINT8)
 
         while True:
-            tok = self._next_token()
-            if tok.id is _T_BYTE:
-                prop.value += tok.val.to_bytes(1, "big")
+            tok_id, tok_val = self._next_token()
+            if tok_id is _T_BYTE:
+                prop.value += tok_val.to_bytes(1, "big")
 
-            elif tok.id is _T_LABEL:
-                prop._add_marker(_REF_LABEL, tok.val)
+            elif tok_id is _T_LABEL:
+                prop._add_marker(_REF_LABEL, tok_val)
 
-            elif tok.val == "]":
+            elif tok_val == "]":
                 return
 
             else:
@@ -506,24 +514,26 @@ class DT:
 
         self._expect_token("(")
 
-        tok = self._next_token()
-        if tok.id is not _T_STRING:
+        tok_id, filename = self._next_token()
+        if tok_id is not _T_STRING:
             self._parse_error("expected quoted filename")
-        filename = tok.val
+        # /incbin/ looks in the directory of the file it appears in first
+        dirname = os.path.dirname(
+            self._tok_sources[self._tok_files[self._tok_idx - 1]][0])
 
-        tok = self._next_token()
-        if tok.val == ",":
+        tok_val = self._next_token()[1]
+        if tok_val == ",":
             offset = self._eval_prim()
             self._expect_token(",")
             size = self._eval_prim()
             self._expect_token(")")
         else:
-            if tok.val != ")":
+            if tok_val != ")":
                 self._parse_error("expected ',' or ')'")
             offset = None
 
         try:
-            with self._open(filename, "rb") as f:
+            with self._open(filename, "rb", dirname=dirname) as f:
                 if offset is None:
                     prop.value += f.read()
                 else:
@@ -537,11 +547,8 @@ class DT:
         # _parse_assignment() helper for parsing labels before/after each
         # comma-separated value
 
-        while True:
-            tok = self._peek_token()
-            if tok.id is not _T_LABEL:
-                return
-            prop._add_marker(_REF_LABEL, tok.val)
+        while self._peek_id() is _T_LABEL:
+            prop._add_marker(_REF_LABEL, self._peek_val())
             self._next_token()
 
     def _node_phandle(self, node):
@@ -572,12 +579,10 @@ class DT:
     # Expression evaluation
 
     def _eval_prim(self):
-        tok = self._peek_token()
-        if tok.id in (_T_NUM, _T_CHAR_LITERAL):
-            return self._next_token().val
+        if self._peek_id() in (_T_NUM, _T_CHAR_LITERAL):
+            return self._next_token()[1]
 
-        tok = self._next_token()
-        if tok.val != "(":
+        if self._next_token()[1] != "(":
             self._parse_error("expected number or parenthesized expression")
         val = self._eval_ternary()
         self._expect_token(")")
@@ -697,154 +702,233 @@ class DT:
     # Lexing
     #
 
-    def _check_token(self, val):
-        if self._peek_token().val == val:
-            self._next_token()
-            return True
-        return False
-
-    def _peek_token(self):
-        if not self._saved_token:
-            self._saved_token = self._next_token()
-        return self._saved_token
-
-    def _next_token(self):
-        if self._saved_token:
-            tmp = self._saved_token
-            self._saved_token = None
-            return tmp
+    def _tokenize(self):
+        # Splits the .dts file and the files it /include/s into tokens, in a
+        # single pass. The tokens are stored in parallel lists:
+        #
+        #   self._tok_ids:    Token type (_T_*)
+        #   self._tok_vals:   Token value
+        #   self._tok_lines:  Line number
+        #   self._tok_starts: Offset of the token in the contents of its file
+        #   self._tok_files:  Index in self._tok_sources of the
+        #                     (filename, contents) tuple for its file
+        #
+        # The parser consumes them by index, starting at self._tok_idx. This
+        # avoids creating an object for each token.
+        #
+        # Errors found while tokenizing, in /include/s and character literals,
+        # are raised right away. Tokens that aren't valid in any context
+        # become _T_BAD tokens, so that the parser can give an error for the
+        # context they appear in.
+        #
+        # This is the hot loop when parsing large devicetrees, so everything
+        # is kept in local variables. self._lineno and self._tok_i are only
+        # updated before calling functions that might generate errors.
+
+        self._tok_ids = ids = []
+        self._tok_vals = vals = []
+        self._tok_lines = lines = []
+        self._tok_starts = starts = []
+        self._tok_files = files = []
+        self._tok_sources = sources = [(self.filename, self._file_contents)]
+        add_id = ids.append
+        add_val = vals.append
+        add_line = lines.append
+        add_start = starts.append
+        add_file = files.append
+
+        contents = self._file_contents
+        file_i = 0
+        pos = 0
+        lineno = self._lineno
+        # Start of the previous token
+        tok_i = 0
+        match_token, state_tok_id = _state_token_matchers[_DEFAULT]
 
         while True:
-            tok_id = None
-
-            match = _token_re.match(self._file_contents, self._tok_end_i)
-            if match:
-                tok_id = match.lastindex
-                if tok_id is _T_CHAR_LITERAL:
-                    val = self._unescape(match.group(tok_id).encode("utf-8"))
-                    if len(val) != 1:
-                        self._parse_error("character literals must be length 1")
-                    tok_val = ord(val)
-                else:
-                    tok_val = match.group(tok_id)
-
-            elif self._lexer_state is _DEFAULT:
-                match = _num_re.match(self._file_contents, self._tok_end_i)
-                if match:
-                    tok_id = _T_NUM
-                    num_s = match.group(1)
-                    tok_val = int(num_s,
-                                  16 if num_s.startswith(("0x", "0X")) else
-                                  8 if num_s[0] == "0" else
+            match = match_token(contents, pos)
+            if not match:
+                # Could get here due to a node/property naming appearing in
+                # an unexpected context as well as for bad characters in
+                # files. Generate a token for it so that the error can
+                # trickle up to some context where we can give a more helpful
+                # error message. Nothing after it is used.
+                skipped = _skip_re.match(contents, pos).group()
+                add_id(_T_BAD)
+                add_val("<unknown token>")
+                add_line(lineno + skipped.count("\n"))
+                add_start(pos + len(skipped))
+                add_file(file_i)
+                break
+
+            # Whitespace and comments before the token
+            skipped = match.group(1)
+            if skipped:
+                lineno += skipped.count("\n")
+
+            tok_id = match.lastindex
+            tok_val = match.group(tok_id)
+
+            if tok_id is _T_STATE:
+                tok_id = state_tok_id
+                if tok_id is _T_NUM:
+                    tok_val = int(tok_val,
+                                  16 if tok_val.startswith(("0x", "0X")) else
+                                  8 if tok_val[0] == "0" else
                                   10)
-
-            elif self._lexer_state is _EXPECT_PROPNODENAME:
-                match = _propnodename_re.match(self._file_contents,
-                                               self._tok_end_i)
-                if match:
-                    tok_id = _T_PROPNODENAME
-                    tok_val = match.group(1)
-                    self._lexer_state = _DEFAULT
-
-            else:  # self._lexer_state is _EXPECT_BYTE
-                match = _byte_re.match(self._file_contents, self._tok_end_i)
-                if match:
-                    tok_id = _T_BYTE
-                    tok_val = int(match.group(), 16)
-
-
-            if not tok_id:
-                match = _misc_re.match(self._file_contents, self._tok_end_i)
-                if match:
-                    tok_id = _T_MISC
-                    tok_val = match.group()
+                elif tok_id is _T_BYTE:
+                    tok_val = int(tok_val, 16)
+
+            elif tok_id is _T_CHAR_LITERAL:
+                # Errors point at the whitespace/comment or token before the
+                # character literal
+                self._lineno = lineno
+                if skipped:
+                    for piece in _skip_piece_re.finditer(skipped):
+                        pass
+                    self._tok_i = pos + piece.start()
                 else:
-                    self._tok_i = self._tok_end_i
-                    # Could get here due to a node/property naming appearing in
-                    # an unexpected context as well as for bad characters in
-                    # files. Generate a token for it so that the error can
-                    # trickle up to some context where we can give a more
-                    # helpful error message.
-                    return _Token(_T_BAD, "<unknown token>")
-
-            self._tok_i = match.start()
-            self._tok_end_i = match.end()
-
-            if tok_id is _T_SKIP:
-                self._lineno += tok_val.count("\n")
-                continue
+                    self._tok_i = tok_i
+                val = self._unescape(tok_val.encode("utf-8"))
+                if len(val) != 1:
+                    self._parse_error("character literals must be length 1")
+                tok_val = ord(val)
 
             # /include/ is handled in the lexer in the C tools as well, and can
             # appear anywhere
-            if tok_id is _T_INCLUDE:
+            elif tok_id is _T_INCLUDE:
                 # Can have newlines between /include/ and the filename
-                self._lineno += tok_val.count("\n")
+                lineno += tok_val.count("\n")
                 # Do this manual extraction instead of doing it in the regex so
                 # that we can properly count newlines
                 filename = tok_val[tok_val.find('"') + 1:-1]
+                self._filestack.append(
+                    (self.filename, lineno, contents, match.end(), file_i))
+                self._lineno = lineno
+                self._tok_i = tok_i = pos + len(skipped)
                 self._enter_file(filename)
+                contents = self._file_contents
+                pos = 0
+                lineno = 1
+                sources.append((self.filename, contents))
+                file_i = len(sources) - 1
                 continue
 
-            if tok_id is _T_LINE:
+            elif tok_id is _T_LINE:
                 # #line directive
-                self._lineno = int(tok_val.split()[0]) - 1
+                lineno = int(tok_val.split()[0]) - 1
                 self.filename = tok_val[tok_val.find('"') + 1:-1]
+                sources.append((self.filename, contents))
+                file_i = len(sources) - 1
+                tok_i = pos + len(skipped)
+                pos = match.end()
                 continue
 
-            if tok_id is _T_EOF:
+            elif tok_id is _T_EOF:
+                tok_i = pos + len(skipped)
                 if self._filestack:
-                    self._leave_file()
+                    self.filename, lineno, contents, pos, file_i = \
+                        self._filestack.pop()
+                    self._file_contents = contents
                     continue
-                return _Token(_T_EOF, "<EOF>")
 
-            # State handling
+                add_id(_T_EOF)
+                add_val("<EOF>")
+                add_line(lineno)
+                add_start(tok_i)
+                add_file(file_i)
+                break
 
-            if tok_id in (_T_DEL_PROP, _T_DEL_NODE, _T_OMIT_IF_NO_REF) or \
-               tok_val in ("{", ";"):
+            tok_i = pos + len(skipped)
+            pos = match.end()
 
-                self._lexer_state = _EXPECT_PROPNODENAME
+            add_id(tok_id)
+            add_val(tok_val)
+            add_line(lineno)
+            add_start(tok_i)
+            add_file(file_i)
 
-            elif tok_val == "[":
-                self._lexer_state = _EXPECT_BYTE
+            # State handling. This also looks at the value of strings, so
+            # that e.g. "{" changes the state as well.
 
-            elif tok_id in (_T_MEMRESERVE, _T_BITS) or tok_val == "]":
-                self._lexer_state = _DEFAULT
+            if tok_id is _T_MISC or tok_id is _T_STRING:
+                state = _val2state.get(tok_val)
+            else:
+                state = _tok2state.get(tok_id)
+            if state is not None:
+                match_token, state_tok_id = _state_token_matchers[state]
+
+    def _check_token(self, val):
+        if self._tok_vals[self._tok_idx] == val:
+            self._tok_idx += 1
+            self._peeked = False
+            return True
+        self._peeked = True
+        return False
+
+    def _peek_id(self):
+        # Returns the type of the next token without consuming it
 
-            return _Token(tok_id, tok_val)
+        self._peeked = True
+        return self._tok_ids[self._tok_idx]
+
+    def _peek_val(self):
+        # Returns the value of the next token without consuming it
+
+        self._peeked = True
+        return self._tok_vals[self._tok_idx]
+
+    def _next_token(self):
+        # Consumes the next token. Returns its (type, value) tuple.
+
+        i = self._tok_idx
+        self._tok_idx = i + 1
+        self._peeked = False
+        return self._tok_ids[i], self._tok_vals[i]
 
     def _expect_token(self, tok_val):
         # Raises an error if the next token does not have the string value
         # 'tok_val'. Returns the token.
 
         tok = self._next_token()
-        if tok.val != tok_val:
+        if tok[1] != tok_val:
             self._parse_error("expected '{}', not '{}'"
-                              .format(tok_val, tok.val))
+                              .format(tok_val, tok[1]))
 
         return tok
 
     def _expect_num(self):
         # Raises an error if the next token is not a number. Returns the token.
 
-        tok = self._next_token()
-        if tok.id is not _T_NUM:
+        tok_id, tok_val = self._next_token()
+        if tok_id is not _T_NUM:
             self._parse_error("expected number")
-        return tok.val
+        return tok_val
 
     def _parse_error(self, s):
+        if self._tok_idx is None:
+            # Tokenizing. Point at the token being lexed.
+            filename = self.filename
+            lineno = self._lineno
+            tok_i = self._tok_i
+            contents = self._file_contents
+        else:
+            # Parsing. Point at the last token looked at.
+            i = self._tok_idx if self._peeked else self._tok_idx - 1
+            filename, contents = self._tok_sources[self._tok_files[i]]
+            lineno = self._tok_lines[i]
+            tok_i = self._tok_starts[i]
+
         _err("{}:{} (column {}): parse error: {}".format(
-            self.filename, self._lineno,
+            filename, lineno,
             # This works out for the first line of the file too, where rfind()
             # returns -1
-            self._tok_i - self._file_contents.rfind("\n", 0, self._tok_i + 1),
+            tok_i - contents.rfind("\n", 0, tok_i + 1),
             s))
 
     def _enter_file(self, filename):
-        # Enters the /include/d file 'filename', remembering the position in
-        # the /include/ing file for later
-
-        self._filestack.append((self.filename, self._lineno,
-                                self._file_contents, self._tok_end_i))
+        # Enters the /include/d file 'filename'. The position in the
+        # /include/ing file has been pushed on self._filestack.
 
         # Handle escapes in filenames, just for completeness
         filename = self._unescape(filename.encode("utf-8"))
@@ -869,25 +953,18 @@ class DT:
 
         self.filename = f.name
         self._lineno = 1
-        self._tok_end_i = 0
-
-    def _leave_file(self):
-        # Leaves an /include/d file, returning to the file that /include/d it
-
-        self.filename, self._lineno, self._file_contents, self._tok_end_i = \
-            self._filestack.pop()
 
     def _next_ref2node(self):
         # Checks that the next token is a label/path reference and returns the
         # Node it points to. Only used during parsing, so uses _parse_error()
         # on errors to save some code in callers.
 
-        label = self._next_token()
-        if label.id is not _T_REF:
+        tok_id, label = self._next_token()
+        if tok_id is not _T_REF:
             self._parse_error(
                 "expected label (&foo) or path (&{/foo/bar}) reference")
         try:
-            return self._ref2node(label.val)
+            return self._ref2node(label)
         except DTError as e:
             self._parse_error(e)
 
@@ -1137,17 +1214,18 @@ class DT:
 
         return _unescape_re.sub(sub, b)
 
-    def _open(self, filename, mode="r", **kwargs):
+    def _open(self, filename, mode="r", dirname=None, **kwargs):
         # Wrapper around standard Python open(), accepting the same params.
-        # But searches for a 'filename' file in the directory of the current
-        # file and the include path.
+        # But searches for a 'filename' file in 'dirname' (by default, the
+        # directory of the current file) and the include path.
 
         # The C tools support specifying stdin with '-' too
         if filename == "-":
             return sys.stdin.buffer if "b" in mode else sys.stdin
 
         # Try the directory of the current file first
-        dirname = os.path.dirname(self.filename)
+        if dirname is None:
+            dirname = os.path.dirname(self.filename)
         try:
             return open(os.path.join(dirname, filename), mode, **kwargs)
         except OSError as e:
@@ -1218,6 +1296,8 @@ class Node:
     dt:
       The DT instance this node belongs to.
     """
+    __slots__ = ("name", "parent", "dt", "props", "nodes", "labels",
+                 "_omit_if_no_ref", "_is_referenced")
 
     #
     # Public interface
@@ -1381,6 +1461,8 @@ class Property:
     node:
       The Node the property is on.
     """
+    __slots__ = ("name", "node", "value", "labels", "offset_labels",
+                 "_markers")
 
     #
     # Public interface
@@ -1851,8 +1933,6 @@ class DTError(Exception):
     "Exception raised for devicetree-related errors"
 
 
-_Token = collections.namedtuple("Token", "id val")
-
 # Lexer states
 _DEFAULT = 0
 _EXPECT_PROPNODENAME = 1
@@ -1874,6 +1954,14 @@ _misc_re = re.compile(
 
 _byte_re = re.compile(r"[0-9a-fA-F]{2}")
 
+# Whitespace, a C comment, or a C++ comment
+_skip_piece_re = re.compile(r"\s+|/\*(?:.|\n)*?\*/|//.*$",
+                            re.MULTILINE | re.ASCII)
+
+# Any amount of whitespace and comments
+_skip_re = re.compile("(?:{})*".format(_skip_piece_re.pattern),
+                      re.MULTILINE | re.ASCII)
+
 # Matches a backslash escape within a 'bytes' array. Captures the 'c' part of
 # '\c', where c might be a single character or an octal/hex escape.
 _unescape_re = re.compile(br'\\([0-7]{1,3}|x[0-9A-Fa-f]{1,2}|.)')
@@ -1885,11 +1973,20 @@ _line_re = re.compile(
 
 
 def _init_tokens():
-    # Builds a (<token 1>)|(<token 2>)|... regex and assigns the index of each
-    # capturing group to a corresponding _T_<TOKEN> variable. This makes the
-    # token type appear in match.lastindex after a match.
-
-    global _token_re
+    # Builds a (<token 1>)|(<token 2>)|... regex for each lexer state and
+    # assigns the index of each capturing group to a corresponding _T_<TOKEN>
+    # variable. This makes the token type appear in match.lastindex after a
+    # match.
+    #
+    # The regex for a state tries the tokens that are valid in all states
+    # first, then the token specific to the state (a number, a property/node
+    # name, or a byte), and then the misc. tokens. Its capturing group is
+    # _T_STATE, which the lexer translates to the type of the token.
+
+    global _state_token_matchers
+    global _tok2state
+    global _val2state
+    global _T_STATE
     global _T_NUM
     global _T_PROPNODENAME
     global _T_MISC
@@ -1898,7 +1995,7 @@ def _init_tokens():
 
     # Each pattern must have exactly one capturing group, which can capture any
     # part of the pattern. This makes match.lastindex match the token type.
-    # _Token.val is based on the captured string.
+    # The token value is based on the captured string.
     token_spec = (("_T_INCLUDE",        r'(/include/\s*"(?:[^\\"]|\\.)*")'),
                   ("_T_LINE",  # #line directive
                    r'^#(?:line)?[ \t]+([0-9]+[ \t]+"(?:[^\\"]|\\.)*")(?:[ \t]+[0-9]+)?'),
@@ -1915,26 +2012,63 @@ def _init_tokens():
                   ("_T_REF",
                    r"&([a-zA-Z_][a-zA-Z0-9_]*|{[a-zA-Z0-9,._+*#?@/-]*})"),
                   ("_T_INCBIN",         r"(/incbin/)"),
-                  # Whitespace, C comments, and C++ comments
-                  ("_T_SKIP", r"(\s+|(?:/\*(?:.|\n)*?\*/)|//.*$)"),
                   # Return a token for end-of-file so that the parsing code can
                   # always assume that there are more tokens when looking
                   # ahead. This simplifies things.
                   ("_T_EOF",            r"(\Z)"))
 
-    # MULTILINE is needed for C++ comments and #line directives
-    _token_re = re.compile("|".join(spec[1] for spec in token_spec),
-                           re.MULTILINE | re.ASCII)
-
-    for i, spec in enumerate(token_spec, 1):
+    # Group 1 is the whitespace and comments before the token
+    for i, spec in enumerate(token_spec, 2):
         globals()[spec[0]] = i
 
     # pylint: disable=undefined-loop-variable
-    _T_NUM = i + 1
-    _T_PROPNODENAME = i + 2
-    _T_MISC = i + 3
-    _T_BYTE = i + 4
-    _T_BAD = i + 5
+    _T_STATE = i + 1
+    _T_MISC = i + 2
+    _T_NUM = i + 3
+    _T_PROPNODENAME = i + 4
+    _T_BYTE = i + 5
+    _T_BAD = i + 6
+
+    def state_re(state_pat):
+        # The whitespace and comments are matched in a lookahead, which makes
+        # the match atomic. Otherwise, a '/' from a comment could be matched
+        # as a token after backtracking.
+        #
+        # MULTILINE is needed for C++ comments and #line directives.
+        return re.compile(
+            r"(?=({}))\1(?:{})".format(
+                _skip_re.pattern,
+                "|".join([spec[1] for spec in token_spec] +
+                         [state_pat, "(" + _misc_re.pattern + ")"])),
+            re.MULTILINE | re.ASCII)
+
+    # Indexed by lexer state. Each entry is a (<match() method of regex>,
+    # <token type of _T_STATE>) tuple.
+    _state_token_matchers = [
+        # _DEFAULT
+        (state_re(_num_re.pattern).match, _T_NUM),
+        # _EXPECT_PROPNODENAME
+        (state_re(_propnodename_re.pattern).match, _T_PROPNODENAME),
+        # _EXPECT_BYTE
+        (state_re("(" + _byte_re.pattern + ")").match, _T_BYTE)]
+
+    # Lexer state after a token, for the tokens that change it. Tokens not
+    # in these dicts leave the state as is.
+
+    _tok2state = {
+        _T_DEL_PROP: _EXPECT_PROPNODENAME,
+        _T_DEL_NODE: _EXPECT_PROPNODENAME,
+        _T_OMIT_IF_NO_REF: _EXPECT_PROPNODENAME,
+        _T_PROPNODENAME: _DEFAULT,
+        _T_MEMRESERVE: _DEFAULT,
+        _T_BITS: _DEFAULT}
+
+    # For _T_MISC and _T_STRING tokens, by value
+    _val2state = {
+        "{": _EXPECT_PROPNODENAME,
+        ";": _EXPECT_PROPNODENAME,
+        "[": _EXPECT_BYTE,
+        "]": _DEFAULT}
 
 
 _init_tokens()
@@ -66,9 +66,14 @@ a .dts file to parse and a list of paths to directories containing bindings.
 #   things consistent (''-quoting is more common otherwise in Python)
 
 from collections import OrderedDict
+import copy
+import hashlib
+import io
 import os
+import pickle
 import re
 import sys
+import threading
 
 import yaml
 try:
@@ -78,8 +83,8 @@ try:
 except ImportError:
     from yaml import Loader
 
-from dtlib import DT, DTError, to_num, to_nums, TYPE_EMPTY, TYPE_NUMS, \
-                  TYPE_PHANDLE, TYPE_PHANDLES_AND_NUMS
+from dtlib import DT, DTError, to_num, to_nums, TYPE_EMPTY, TYPE_NUM, \
+                  TYPE_NUMS, TYPE_PHANDLE, TYPE_PHANDLES_AND_NUMS
 from grutils import Graph
 
 #
@@ -96,6 +101,12 @@ class EDT:
     nodes:
       A list of Node objects for the nodes that appear in the devicetree
 
+    compat2enabled:
+      A dictionary that maps each 'compatible' string that appears on some
+      enabled Node to a list of the enabled Nodes that have it, in the order
+      the nodes appear in the devicetree. 'compatible' strings that don't
+      appear on any enabled Node are not in the dictionary.
+
     dts_path:
       The .dts path passed to __init__()
 
@@ -162,6 +173,15 @@ class EDT:
         return "<EDT for '{}', binding directories '{}'>".format(
             self.dts_path, self.bindings_dirs)
 
+    def __getstate__(self):
+        # The warning file can't be pickled. load_edt() sets it when
+        # loading a snapshot. The binding index is only needed while
+        # constructing the EDT.
+        state = self.__dict__.copy()
+        del state["_warn_file"]
+        state.pop("_index", None)
+        return state
+
     def scc_order(self):
         """
         Returns a list of lists of Nodes where all elements of each list
@@ -229,37 +249,30 @@ class EDT:
         # are loaded.
 
         dt_compats = _dt_compats(self._dt)
-        # Searches for any 'compatible' string mentioned in the devicetree
-        # files, with a regex
-        dt_compats_search = re.compile(
-            "|".join(re.escape(compat) for compat in dt_compats)
-        ).search
 
-        self._binding_paths = _binding_paths(bindings_dirs)
+        # Bindings are looked up in an index shared by all EDT instances,
+        # which only parses new and modified binding files
+        self._index = _binding_index(bindings_dirs)
+        self._binding_paths = self._index.paths
 
         self._compat2binding = {}
-        for binding_path in self._binding_paths:
-            with open(binding_path, encoding="utf-8") as f:
-                contents = f.read()
-
-            # As an optimization, skip parsing files that don't contain any of
-            # the .dts 'compatible' strings, which should be reasonably safe
-            if not dt_compats_search(contents):
-                continue
-
-            # Load the binding and check that it actually matches one of the
-            # compatibles. Might get false positives above due to comments and
-            # stuff.
+        for binding_path in self._index.candidates(dt_compats):
+            entry = self._index.binding(binding_path)
+            binding = entry.binding
 
-            try:
-                # Parsed PyYAML output (Python lists/dictionaries/strings/etc.,
-                # representing the file)
-                binding = yaml.load(contents, Loader=_BindingLoader)
-            except yaml.YAMLError as e:
+            if binding is _INVALID_YAML:
                 self._warn("'{}' appears in binding directories but isn't "
-                           "valid YAML: {}".format(binding_path, e))
+                           "valid YAML: {}".format(binding_path, entry.error))
                 continue
 
+            # Parsed PyYAML output (Python lists/dictionaries/strings/etc.,
+            # representing the file). The indexed copy is shared and must not
+            # be modified.
+            binding = copy.deepcopy(binding)
+
+            # Check that the binding actually matches one of the compatibles.
+            # Might get false positives for bindings that were picked up by
+            # searching their text.
             binding_compat = self._binding_compat(binding, binding_path)
             if binding_compat not in dt_compats:
                 # Either not a binding (binding_compat is None -- might be a
@@ -410,8 +423,7 @@ class EDT:
         # basename of the file, so we check that there aren't multiple
         # candidates.
 
-        paths = [path for path in self._binding_paths
-                 if os.path.basename(path) == fname]
+        paths = self._index.basename2paths.get(fname)
 
         if not paths:
             _err("'{}' not found".format(fname))
@@ -420,10 +432,13 @@ class EDT:
             _err("multiple candidates for included file '{}': {}"
                  .format(fname, ", ".join(paths)))
 
-        with open(paths[0], encoding="utf-8") as f:
-            return self._merge_included_bindings(
-                yaml.load(f, Loader=_BindingLoader),
-                paths[0])
+        binding = self._index.binding(paths[0]).binding
+        if binding is _INVALID_YAML:
+            # Raises the same exception as when the index was updated
+            with open(paths[0], encoding="utf-8") as f:
+                binding = yaml.load(f, Loader=_BindingLoader)
+
+        return self._merge_included_bindings(copy.deepcopy(binding), paths[0])
 
     def _init_nodes(self):
         # Creates a list of edtlib.Node objects from the dtlib.Node objects, in
@@ -433,6 +448,7 @@ class EDT:
         self._node2enode = {}
 
         self.nodes = []
+        self.compat2enabled = {}
 
         for dt_node in self._dt.node_iter():
             # Warning: We depend on parent Nodes being created before their
@@ -448,6 +464,10 @@ class EDT:
             self.nodes.append(node)
             self._node2enode[dt_node] = node
 
+            if node.enabled:
+                for compat in node.compats:
+                    self.compat2enabled.setdefault(compat, []).append(node)
+
         for node in self.nodes:
             # These depend on all Node objects having been created, because
             # they (either always or sometimes) reference other nodes, so we
@@ -750,6 +770,10 @@ class Node:
       The flash controller for the node. Only meaningful for nodes representing
       flash partitions.
     """
+    __slots__ = ("edt", "_node", "bus_node", "compats", "matching_compat",
+                 "_binding", "binding_path", "regs", "instance_no", "props",
+                 "interrupts", "pinctrls", "dep_ordinal")
+
     @property
     def name(self):
         "See the class docstring"
@@ -992,24 +1016,35 @@ class Node:
         if not prop_type:
             _err("'{}' in {} lacks 'type'".format(name, self.binding_path))
 
-        val = self._prop_val(
-            name, prop_type,
-            options.get("required") or options.get("category") == "required",
-            options.get("default"))
+        enum = options.get("enum")
+        const = options.get("const")
+
+        dt_prop = self._node.props.get(name)
+        if dt_prop and enum is None and const is None and \
+           name[0] != "#" and not name.endswith("-map") and \
+           dt_prop.type in _LAZY_PROP_TYPES.get(prop_type, ()):
+            # The value is converted when Property.val is first accessed. The
+            # type check above is the only check done when converting, so
+            # errors are still reported here.
+            val = _UNCONVERTED
+        else:
+            val = self._prop_val(
+                name, prop_type,
+                options.get("required") or
+                options.get("category") == "required",
+                options.get("default"))
 
         if val is None:
             # 'required: false' property that wasn't there, or a property type
             # for which we store no data.
             return
 
-        enum = options.get("enum")
         if enum and val not in enum:
             _err("value of property '{}' on {} in {} ({!r}) is not in 'enum' "
                  "list in {} ({!r})"
                  .format(name, self.path, self.edt.dts_path, val,
                          self.binding_path, enum))
 
-        const = options.get("const")
         if const is not None and val != const:
             _err("value of property '{}' on {} in {} ({!r}) is different from "
                  "the 'const' value specified in {} ({!r})"
@@ -1027,7 +1062,7 @@ class Node:
         prop.description = options.get("description")
         if prop.description:
             prop.description = prop.description.strip()
-        prop.val = val
+        prop._val = val
         prop.type = prop_type
         prop.enum_index = None if enum is None else enum.index(val)
 
@@ -1296,15 +1331,15 @@ class Node:
         return OrderedDict(zip(cell_names, data_list))
 
     def _set_instance_no(self):
-        # Initializes self.instance_no
+        # Initializes self.instance_no. Called before the node is added to
+        # EDT.compat2enabled, which holds the enabled nodes that come before
+        # it at that point.
 
         self.instance_no = {}
 
         for compat in self.compats:
-            self.instance_no[compat] = 0
-            for other_node in self.edt.nodes:
-                if compat in other_node.compats and other_node.enabled:
-                    self.instance_no[compat] += 1
+            self.instance_no[compat] = \
+                len(self.edt.compat2enabled.get(compat, ()))
 
 
 class Register:
@@ -1327,6 +1362,8 @@ class Register:
     size:
       The length of the register in bytes
     """
+    __slots__ = ("node", "name", "addr", "size")
+
     def __repr__(self):
         fields = []
 
@@ -1366,6 +1403,8 @@ class ControllerAndData:
       'interrupt-names'/'gpio-names'/'pwm-names'/etc., or None if there is no
       *-names property
     """
+    __slots__ = ("node", "controller", "data", "name")
+
     def __repr__(self):
         fields = []
 
@@ -1398,6 +1437,8 @@ class PinCtrl:
 
           pinctrl-0 = <&state_1 &state_2>;
     """
+    __slots__ = ("node", "name", "conf_nodes")
+
     def __repr__(self):
         fields = []
 
@@ -1454,6 +1495,18 @@ class Property:
       The index of the property's value in the 'enum:' list in the binding, or
       None if the binding has no 'enum:'
     """
+    __slots__ = ("node", "name", "description", "type", "enum_index", "_val")
+
+    @property
+    def val(self):
+        "See the class docstring"
+
+        # Values of some types are converted from the devicetree property on
+        # first access. See Node._init_prop().
+        if self._val is _UNCONVERTED:
+            self._val = self.node._prop_val(self.name, self.type, False, None)
+        return self._val
+
     def __repr__(self):
         fields = ["name: " + self.name,
                   # repr() to deal with lists
@@ -1475,6 +1528,102 @@ class EDTError(Exception):
 #
 
 
+def load_edt(dts, bindings_dirs, warn_file=None, cache_dir=None,
+             edt_pickle=None):
+    """
+    Returns EDT(dts, bindings_dirs, warn_file), using a snapshot cache if
+    'cache_dir' is not None, and the EDT saved by save_edt() if 'edt_pickle'
+    is not None.
+
+    Snapshots of constructed EDT objects are pickled to files in 'cache_dir',
+    named after a hash of the contents of 'dts', the bindings directories, and
+    the edtlib/dtlib sources. A snapshot is only used if no binding file in
+    'bindings_dirs' was added, removed, or modified since it was saved (files
+    whose modification time changed but not their contents are fine).
+    Warnings generated while constructing the EDT are saved with the snapshot
+    and written to 'warn_file' again when it is loaded.
+
+    Files included with /include/ from 'dts' are not tracked, which is fine
+    for the C-preprocessed devicetrees used by Zephyr.
+
+    The index of the bindings in 'bindings_dirs' (see EDT) is saved in
+    'cache_dir' as well, so that only bindings modified since the last call
+    need to be parsed when there is no snapshot.
+
+    cache_dir:
+      Directory to keep snapshots in, created if missing. Can be shared by
+      builds for different boards.
+
+    edt_pickle:
+      Path to a file written by save_edt(). The EDT in it is returned if it
+      was saved for the same 'dts' contents and bindings, under the same
+      conditions as for snapshots. Otherwise, or if the file doesn't exist,
+      the EDT is constructed (or loaded from 'cache_dir') as usual. Warnings
+      are not written again, as they were already written when the saved EDT
+      was constructed.
+    """
+    if warn_file is None:
+        warn_file = sys.stderr
+
+    if cache_dir is None and edt_pickle is None:
+        return EDT(dts, bindings_dirs, warn_file)
+
+    key = _snapshot_key(dts, bindings_dirs)
+    binding_stats = _binding_stats(bindings_dirs)
+
+    if edt_pickle is not None:
+        edt = _load_snapshot(edt_pickle, key, binding_stats)
+        if edt:
+            edt.dts_path = dts
+            edt.bindings_dirs = bindings_dirs
+            edt._warn_file = warn_file
+            return edt
+
+        if cache_dir is None:
+            return EDT(dts, bindings_dirs, warn_file)
+
+    snapshot_path = os.path.join(cache_dir, key + ".pickle")
+
+    edt = _load_snapshot(snapshot_path, key, binding_stats)
+    if edt:
+        edt.dts_path = dts
+        edt.bindings_dirs = bindings_dirs
+        edt._warn_file = warn_file
+        warn_file.write(edt._snapshot_warnings)
+        return edt
+
+    index = _binding_index(bindings_dirs, cache_dir)
+
+    warnings = io.StringIO()
+    edt = EDT(dts, bindings_dirs, warnings)
+    edt._warn_file = warn_file
+
+    index.save()
+    edt._snapshot_warnings = warnings.getvalue()
+    warn_file.write(edt._snapshot_warnings)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        _save_snapshot(snapshot_path, key, binding_stats, edt)
+    except OSError as e:
+        edt._warn("could not save devicetree snapshot to '{}': {}"
+                  .format(snapshot_path, e))
+
+    return edt
+
+
+def save_edt(edt, path):
+    """
+    Saves 'edt' to the file at 'path', for load_edt() to load instead of
+    constructing the EDT again. This lets several tools that look at the
+    devicetree of a build share the EDT constructed for it.
+
+    Raises OSError if the file can't be written.
+    """
+    _save_snapshot(path, _snapshot_key(edt.dts_path, edt.bindings_dirs),
+                   _binding_stats(edt.bindings_dirs), edt)
+
+
 def spi_dev_cs_gpio(node):
     # Returns an SPI device's GPIO chip select if it exists, as a
     # ControllerAndData instance, and None otherwise. See
@@ -1514,6 +1663,418 @@ def _dt_compats(dt):
                     for compat in node.props["compatible"].to_strings()}
 
 
+class _BindingIndex:
+    # Index of the bindings in a list of bindings directories, used by
+    # EDT._init_compat2binding() to avoid reading and parsing all bindings
+    # for each EDT. Has these attributes:
+    #
+    # paths:
+    #   List with the paths to all bindings, in _binding_paths() order
+    #
+    # files:
+    #   Dictionary that maps each path in 'paths' to an _IndexedBinding
+    #
+    # compat2paths:
+    #   Dictionary that maps each compatible to a set with the paths of the
+    #   parsed bindings that declare it
+    #
+    # basename2paths:
+    #   Dictionary that maps each file basename to a list with the paths of
+    #   the bindings with that name, for resolving 'include:'
+    #
+    # Bindings are parsed the first time they might be needed, and the
+    # contents of unparsed bindings are searched for compatibles instead, like
+    # when no index is used. save() parses all bindings first, so that EDTs
+    # using a saved index never have to read bindings that weren't modified.
+
+    def __init__(self, bindings_dirs, path=None):
+        # 'path' is where save() writes the index, if not None
+
+        self.bindings_dirs = bindings_dirs
+        self.path = path
+        self.paths = []
+        self.files = {}
+        self.compat2paths = {}
+        self.basename2paths = {}
+
+        # Paths of the bindings whose contents need to be searched for
+        # compatibles (see _IndexedBinding.contents)
+        self._search = set()
+
+        self._modified = False
+
+        # Serializes access between threads
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def update(self):
+        # Adds new and modified bindings and drops removed bindings. Only
+        # the bindings directories are walked and the bindings stat()ed if
+        # nothing changed.
+
+        paths = _binding_paths(self.bindings_dirs)
+
+        with self._lock:
+            files = {}
+            modified = paths != self.paths
+            for path in paths:
+                st = os.stat(path)
+                stat = (st.st_mtime_ns, st.st_size)
+
+                entry = self.files.get(path)
+                if not entry or entry.stat != stat:
+                    entry = _IndexedBinding(path, stat)
+                    modified = True
+                files[path] = entry
+
+            if not modified:
+                return
+
+            # Replace the attributes rather than modifying them, so that EDT
+            # instances being constructed in other threads aren't affected
+            self.paths = paths
+            self.files = files
+            self.compat2paths = {}
+            self.basename2paths = {}
+            self._search = set()
+            for path, entry in files.items():
+                self._add(path, entry)
+                self.basename2paths.setdefault(os.path.basename(path), []) \
+                    .append(path)
+
+            self._modified = True
+
+    def candidates(self, compats):
+        # Returns a list with the paths to the bindings that might be for
+        # the compatibles in 'compats', in 'paths' order
+
+        with self._lock:
+            candidates = set()
+            for compat in compats:
+                candidates.update(self.compat2paths.get(compat, ()))
+
+            # Skip bindings that don't contain any of the compatibles, which
+            # should be reasonably safe. Might get false positives due to
+            # comments and stuff, which are checked by parsing the binding.
+            search = re.compile(
+                "|".join(re.escape(compat) for compat in compats)).search
+
+            for path in list(self._search):
+                entry = self.files[path]
+                if not search(entry.contents):
+                    continue
+
+                if entry.binding is _UNPARSED:
+                    self._parse(path, entry)
+
+                if entry.contents is not None or entry.compats & compats:
+                    candidates.add(path)
+
+            return [path for path in self.paths if path in candidates]
+
+    def binding(self, path):
+        # Returns the _IndexedBinding for 'path', parsing it if needed
+
+        with self._lock:
+            entry = self.files[path]
+            if entry.binding is _UNPARSED:
+                self._parse(path, entry)
+            return entry
+
+    def save(self):
+        # Writes the index to 'path', if it was given and something changed
+
+        if self.path is None:
+            return
+
+        with self._lock:
+            if not self._modified:
+                return
+
+            for path in list(self._search):
+                entry = self.files[path]
+                if entry.binding is _UNPARSED:
+                    self._parse(path, entry)
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            try:
+                _atomic_pickle(self.path, self)
+            except OSError:
+                # The index is just rebuilt next time
+                return
+
+            self._modified = False
+
+    def _parse(self, path, entry):
+        # Parses the binding in 'entry' and updates the index. Called with
+        # the lock held.
+
+        self._search.discard(path)
+        entry.parse()
+        self._add(path, entry)
+        self._modified = True
+
+    def _add(self, path, entry):
+        # Adds the binding in 'entry' to compat2paths or _search. Called
+        # with the lock held.
+
+        for compat in entry.compats:
+            self.compat2paths.setdefault(compat, set()).add(path)
+
+        if entry.contents is not None:
+            self._search.add(path)
+
+
+class _IndexedBinding:
+    # A binding in a _BindingIndex. Has these attributes:
+    #
+    # stat:
+    #   The (<modification time>, <size>) of the file when it was read
+    #
+    # binding:
+    #   The parsed PyYAML output, _UNPARSED if the binding hasn't been parsed
+    #   yet, or _INVALID_YAML if the file isn't valid YAML. Must not be
+    #   modified.
+    #
+    # compats:
+    #   Set with the compatibles declared by the binding, without any checks
+    #
+    # contents:
+    #   The contents of the file, if it needs to be searched for compatibles.
+    #   That's the case until the binding is parsed, and for bindings whose
+    #   compatible can't be determined without checks that might generate
+    #   errors (e.g. invalid YAML). Otherwise None.
+    #
+    # error:
+    #   The error message for invalid YAML, and None otherwise
+
+    __slots__ = ("stat", "binding", "compats", "contents", "error")
+
+    def __init__(self, path, stat):
+        self.stat = stat
+        self.binding = _UNPARSED
+        self.compats = set()
+        self.error = None
+        with open(path, encoding="utf-8") as f:
+            self.contents = f.read()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def parse(self):
+        # Parses the binding and sets 'binding', 'compats', and 'contents'
+
+        try:
+            binding = yaml.load(self.contents, Loader=_BindingLoader)
+        except yaml.YAMLError as e:
+            self.binding = _INVALID_YAML
+            self.error = str(e)
+            return
+
+        self.binding = binding
+
+        if not isinstance(binding, dict):
+            # Empty file or spurious file. EDT._binding_compat() returns None
+            # for these, without any errors or warnings.
+            self.contents = None
+            return
+
+        unsure = False
+
+        # New-style 'compatible: "foo"' compatible
+        if "compatible" in binding:
+            if isinstance(binding["compatible"], str):
+                self.compats.add(binding["compatible"])
+            else:
+                # Malformed. Let EDT._binding_compat() report it.
+                unsure = True
+
+        # Old-style 'constraint: "foo"' compatible
+        try:
+            old_compat = binding["properties"]["compatible"]["constraint"]
+        except Exception:
+            old_compat = None
+        if old_compat:
+            if isinstance(old_compat, str):
+                self.compats.add(old_compat)
+            else:
+                unsure = True
+
+        if not unsure:
+            self.contents = None
+
+
+def _binding_index(bindings_dirs, cache_dir=None):
+    # Returns the up-to-date _BindingIndex for 'bindings_dirs'. Indexes are
+    # kept for the lifetime of the process. If 'cache_dir' is not None, a
+    # new index is loaded from there if possible, and saved there by
+    # _BindingIndex.save().
+
+    # Binding paths are relative if 'bindings_dirs' is, so include the
+    # absolute paths in the key as well
+    key = (tuple(bindings_dirs),
+           tuple(os.path.abspath(path) for path in bindings_dirs))
+
+    with _binding_indexes_lock:
+        index = _binding_indexes.get(key)
+
+        if index is None:
+            path = None
+            if cache_dir is not None:
+                path = os.path.join(cache_dir, _binding_index_filename(key))
+                index = _load_binding_index(path)
+
+            if index is None:
+                index = _BindingIndex(bindings_dirs, path)
+
+            _binding_indexes[key] = index
+
+        elif cache_dir is not None and index.path is None:
+            # Index created by an earlier EDT without a cache directory.
+            # Save it from now on.
+            index.path = os.path.join(cache_dir, _binding_index_filename(key))
+            index._modified = True
+
+    index.update()
+    return index
+
+
+def _binding_index_filename(key):
+    # Returns the filename of the saved _BindingIndex for 'key', from
+    # _binding_index()
+
+    return "bindings-{}.pickle".format(hashlib.sha256(
+        (repr(key) + _lib_digest()).encode("utf-8")).hexdigest())
+
+
+def _load_binding_index(path):
+    # Returns the _BindingIndex saved to 'path', or None if there is no
+    # usable index there
+
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or written by an incompatible Python version
+        return None
+
+
+def _snapshot_key(dts, bindings_dirs):
+    # Returns a hex digest of the contents of 'dts', the bindings directories,
+    # and the edtlib/dtlib sources. Snapshots are only used for the same key.
+
+    with open(dts, "rb") as f:
+        key = hashlib.sha256(f.read())
+    for path in bindings_dirs:
+        key.update(os.path.abspath(path).encode("utf-8") + b"\0")
+    key.update(_lib_digest().encode("utf-8"))
+
+    return key.hexdigest()
+
+
+def _save_snapshot(snapshot_path, key, binding_stats, edt):
+    # Pickles 'edt' to 'snapshot_path', along with 'key' and the digest of
+    # each binding file, for _load_snapshot(). 'binding_stats' is from
+    # _binding_stats().
+
+    binding_digests = {path: stat + (_file_digest(path),)
+                       for path, stat in binding_stats.items()}
+
+    _atomic_pickle(snapshot_path, (key, binding_digests, edt))
+
+
+def _load_snapshot(snapshot_path, key, binding_stats):
+    # load_edt() helper. Returns the EDT pickled to 'snapshot_path', or None
+    # if there is no usable snapshot. 'key' is from _snapshot_key(), and
+    # 'binding_stats' has the current (<modification time>, <size>) of each
+    # binding file, from _binding_stats().
+
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot_key, binding_digests, edt = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or written by an incompatible Python version. It gets
+        # overwritten with a new snapshot.
+        return None
+
+    if snapshot_key != key or binding_digests.keys() != binding_stats.keys():
+        return None
+
+    for path, stat in binding_stats.items():
+        mtime, size, digest = binding_digests[path]
+        if stat != (mtime, size) and \
+           (size != stat[1] or _file_digest(path) != digest):
+            return None
+
+    return edt
+
+
+def _binding_stats(bindings_dirs):
+    # Returns a dictionary that maps the path of each binding in
+    # 'bindings_dirs' to a (<modification time>, <size>) tuple
+
+    stats = {}
+    for path in _binding_paths(bindings_dirs):
+        st = os.stat(path)
+        stats[path] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+
+def _atomic_pickle(path, obj):
+    # Pickles 'obj' to 'path'. Writes to a temporary file and renames it, so
+    # that concurrent builds never see a partial file.
+
+    tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _file_digest(path):
+    # Returns the SHA-256 hex digest of the contents of the file at 'path'
+
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _lib_digest():
+    # Returns a digest of the sources of edtlib and dtlib, so that snapshots
+    # are not reused after changes to the libraries
+
+    global _lib_digest_cache
+
+    if _lib_digest_cache is None:
+        import dtlib
+
+        _lib_digest_cache = _file_digest(__file__) + \
+            _file_digest(dtlib.__file__)
+
+    return _lib_digest_cache
+
+
 def _binding_paths(bindings_dirs):
     # Returns a list with the paths to all bindings (.yaml files) in
     # 'bindings_dirs'
@@ -2173,3 +2734,38 @@ _BindingLoader.add_constructor("!include", _binding_include)
 _BindingLoader.add_constructor(
     yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
     lambda loader, node: OrderedDict(loader.construct_pairs(node)))
+
+# Digest of the edtlib and dtlib sources, computed on the first call to
+# _lib_digest()
+_lib_digest_cache = None
+
+# _IndexedBinding.binding values for bindings that haven't been parsed and
+# bindings that aren't valid YAML. Classes so that they survive pickling as the
+# same objects.
+class _UNPARSED:
+    pass
+
+
+class _INVALID_YAML:
+    pass
+
+
+# Property._val value for values that haven't been converted yet. A class for
+# the same reason as above.
+class _UNCONVERTED:
+    pass
+
+
+# Maps each binding property type whose values are converted on the first
+# access of Property.val to the dtlib property types that convert to it
+# without errors. Other types are converted (and checked) when the EDT is
+# created.
+_LAZY_PROP_TYPES = {
+    "int": (TYPE_NUM,),
+    "array": (TYPE_NUM, TYPE_NUMS),
+}
+
+
+# Maps keys from _binding_index() to _BindingIndex instances
+_binding_indexes = {}
+_binding_indexes_lock = threading.Lock()
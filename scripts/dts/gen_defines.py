@@ -27,18 +27,20 @@ import edtlib
 
 
 def main():
-    global conf_file
-    global header_file
+    global conf_lines
+    global header_lines
 
     args = parse_args()
 
     try:
-        edt = edtlib.EDT(args.dts, args.bindings_dirs)
+        edt = edtlib.load_edt(args.dts, args.bindings_dirs,
+                              cache_dir=args.edt_cache_dir)
     except edtlib.EDTError as e:
         sys.exit("devicetree error: " + str(e))
 
-    conf_file = open(args.conf_out, "w", encoding="utf-8")
-    header_file = open(args.header_out, "w", encoding="utf-8")
+    # The output is collected in these and written at the end
+    conf_lines = []
+    header_lines = []
 
     write_top_comment(edt)
 
@@ -74,10 +76,13 @@ def main():
 
     write_flash(edt)
 
-    print("Devicetree configuration written to " + args.conf_out)
+    write_if_changed(args.conf_out, conf_lines)
+    write_if_changed(args.header_out, header_lines)
+
+    if args.edt_pickle_out:
+        edtlib.save_edt(edt, args.edt_pickle_out)
 
-    conf_file.close()
-    header_file.close()
+    print("Devicetree configuration written to " + args.conf_out)
 
 def parse_args():
     # Returns parsed command-line arguments
@@ -91,6 +96,14 @@ def parse_args():
                         help="path to write header to")
     parser.add_argument("--conf-out", required=True,
                         help="path to write configuration file to")
+    parser.add_argument("--edt-pickle-out",
+                        help="path to save the parsed devicetree to, for "
+                        "other scripts to load instead of parsing it again")
+    parser.add_argument("--edt-cache-dir",
+                        default=os.environ.get("ZEPHYR_EDT_CACHE_DIR"),
+                        help="directory with snapshots of parsed "
+                        "devicetrees, to skip parsing the bindings when "
+                        "nothing changed (default: $ZEPHYR_EDT_CACHE_DIR)")
 
     return parser.parse_args()
 
@@ -724,7 +737,7 @@ def out(ident, val, aliases=()):
     #
     # Returns the generated macro name for 'ident'.
 
-    print("#define DT_{:40} {}".format(ident, val), file=header_file)
+    header_lines.append("#define DT_{:40} {}".format(ident, val))
     primary_ident = "DT_{}".format(ident)
 
     # Exclude things that aren't single token values from .conf.  At
@@ -733,16 +746,15 @@ def out(ident, val, aliases=()):
     # brace.
     output_to_conf = not (isinstance(val, str) and val.startswith("{"))
     if output_to_conf:
-        print("{}={}".format(primary_ident, val), file=conf_file)
+        conf_lines.append("{}={}".format(primary_ident, val))
 
     for alias in aliases:
         if alias != ident:
-            print("#define DT_{:40} DT_{}".format(alias, ident),
-                  file=header_file)
+            header_lines.append("#define DT_{:40} DT_{}".format(alias, ident))
             if output_to_conf:
                 # For the configuration file, the value is just repeated for all
                 # the aliases
-                print("DT_{}={}".format(alias, val), file=conf_file)
+                conf_lines.append("DT_{}={}".format(alias, val))
 
     return primary_ident
 
@@ -753,8 +765,8 @@ def out_comment(s, blank_before=True):
     # before the comment.
 
     if blank_before:
-        print(file=header_file)
-        print(file=conf_file)
+        header_lines.append("")
+        conf_lines.append("")
 
     if "\n" in s:
         # Format multi-line comments like
@@ -771,14 +783,33 @@ def out_comment(s, blank_before=True):
             # Vim if space error checking is on, which is annoying.
             res.append(" *" if not line.strip() else " * " + line)
         res.append(" */")
-        print("\n".join(res), file=header_file)
+        header_lines.extend(res)
     else:
         # Format single-line comments like
         #
         #   /* foo bar */
-        print("/* " + s + " */", file=header_file)
+        header_lines.append("/* " + s + " */")
+
+    conf_lines.append("\n".join("# " + line for line in s.splitlines()))
 
-    print("\n".join("# " + line for line in s.splitlines()), file=conf_file)
+
+def write_if_changed(path, lines):
+    # Writes 'lines' to the file at 'path', one per line, but only if the file
+    # doesn't already have that contents. Leaving unchanged files alone keeps
+    # their modification time, so that nothing that depends on them gets
+    # rebuilt.
+
+    contents = "\n".join(lines) + "\n"
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == contents:
+                return
+    except OSError:
+        pass
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(contents)
 
 
 def escape(s):
@@ -4,7 +4,10 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import io
+import os
+import shutil
 import sys
+import tempfile
 
 import edtlib
 
@@ -37,9 +40,10 @@ def run():
 
     warnings = io.StringIO()
     edt = edtlib.EDT("test.dts", ["test-bindings"], warnings)
+    deprecated_warnings = warnings.getvalue()
 
     # Deprecated features are tested too, which generate warnings. Verify them.
-    verify_eq(warnings.getvalue(), """\
+    verify_eq(deprecated_warnings, """\
 warning: The 'properties: compatible: constraint: ...' way of specifying the compatible in test-bindings/deprecated.yaml is deprecated. Put 'compatible: "deprecated"' at the top level of the binding instead.
 warning: the 'inherits:' syntax in test-bindings/deprecated.yaml is deprecated and will be removed - please use 'include: foo.yaml' or 'include: [foo.yaml, bar.yaml]' instead
 warning: 'title:' in test-bindings/deprecated.yaml is deprecated and will be removed (and was never used). Just put a 'description:' that describes the device instead. Use other bindings as a reference, and note that all bindings were updated recently. Think about what information would be useful to other people (e.g. explanations of acronyms, or datasheet links), and put that in as well. The description text shows up as a comment in the generated header. See yaml-multiline.info for how to deal with multiple lines. You probably want 'description: |'.
@@ -228,6 +232,24 @@ warning: "#cells:" in test-bindings/deprecated.yaml is deprecated and will be re
     verify_streq(edt.get_node("/defaults").props,
                  r"OrderedDict([('int', <Property, name: int, type: int, value: 123>), ('array', <Property, name: array, type: array, value: [1, 2, 3]>), ('uint8-array', <Property, name: uint8-array, type: uint8-array, value: b'\x89\xab\xcd'>), ('string', <Property, name: string, type: string, value: 'hello'>), ('string-array', <Property, name: string-array, type: string-array, value: ['hello', 'there']>), ('default-not-used', <Property, name: default-not-used, type: int, value: 234>)])")
 
+    #
+    # Test EDT.compat2enabled and Node.instance_no
+    #
+
+    verify_streq(edt.compat2enabled["instance-no"],
+                 "[<Node /instance-no/node-0 in 'test.dts', no binding>, <Node /instance-no/node-2 in 'test.dts', no binding>]")
+
+    verify_streq(edt.compat2enabled["other"],
+                 "[<Node /instance-no/node-2 in 'test.dts', no binding>]")
+
+    verify_eq(edt.get_node("/instance-no/node-0").instance_no,
+              {"instance-no": 0})
+
+    verify_eq(edt.get_node("/instance-no/node-2").instance_no,
+              {"other": 0, "instance-no": 1})
+
+    verify_eq("does-not-exist" in edt.compat2enabled, False)
+
     #
     # Test having multiple directories with bindings, with a different .dts file
     #
@@ -252,6 +274,108 @@ warning: "#cells:" in test-bindings/deprecated.yaml is deprecated and will be re
     if edt.get_node("/in-dir-1") not in edt.get_node("/").required_by:
         fail("/in-dir-1 should directly depend on /")
 
+    #
+    # Test EDT snapshots
+    #
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bindings_dir = os.path.join(tmp_dir, "test-bindings")
+        cache_dir = os.path.join(tmp_dir, "cache")
+        shutil.copytree("test-bindings", bindings_dir)
+
+        def load_edt():
+            warnings = io.StringIO()
+            edt = edtlib.load_edt("test.dts", [bindings_dir], warnings,
+                                  cache_dir)
+            verify_eq(warnings.getvalue(), deprecated_warnings.replace(
+                "test-bindings/", bindings_dir + "/"))
+            verify_streq(edt.get_node("/defaults").props["int"],
+                         "<Property, name: int, type: int, value: 123>")
+
+            snapshots = [fname for fname in os.listdir(cache_dir)
+                         if not fname.startswith("bindings-")]
+            verify_eq(len(snapshots), 1)
+            return os.stat(os.path.join(cache_dir, snapshots[0])).st_mtime_ns
+
+        saved = load_edt()
+        verify_eq(load_edt(), saved)
+
+        # Changing the modification time of a binding shouldn't invalidate
+        # the snapshot, but changing its contents should
+        os.utime(os.path.join(bindings_dir, "defaults.yaml"), ns=(0, 0))
+        verify_eq(load_edt(), saved)
+
+        with open(os.path.join(bindings_dir, "defaults.yaml"), "a") as f:
+            f.write("\n# comment\n")
+        if load_edt() == saved:
+            fail("snapshot not updated after binding change")
+
+    #
+    # Test sharing an EDT through save_edt()
+    #
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bindings_dir = os.path.join(tmp_dir, "test-bindings")
+        edt_pickle = os.path.join(tmp_dir, "edt.pickle")
+        shutil.copytree("test-bindings", bindings_dir)
+
+        edtlib.save_edt(
+            edtlib.EDT("test.dts", [bindings_dir], io.StringIO()), edt_pickle)
+
+        # Loaded from the pickle, so no warnings are written again
+        warnings = io.StringIO()
+        edt = edtlib.load_edt("test.dts", [bindings_dir], warnings,
+                              edt_pickle=edt_pickle)
+        verify_eq(warnings.getvalue(), "")
+        verify_streq(edt.get_node("/defaults").props["int"],
+                     "<Property, name: int, type: int, value: 123>")
+
+        # Stale after a binding change, so the EDT is constructed again
+        defaults_path = os.path.join(bindings_dir, "defaults.yaml")
+        with open(defaults_path) as f:
+            contents = f.read()
+        with open(defaults_path, "w") as f:
+            f.write(contents.replace("default: 123", "default: 321"))
+
+        warnings = io.StringIO()
+        edt = edtlib.load_edt("test.dts", [bindings_dir], warnings,
+                              edt_pickle=edt_pickle)
+        verify_eq(warnings.getvalue(), deprecated_warnings.replace(
+            "test-bindings/", bindings_dir + "/"))
+        verify_streq(edt.get_node("/defaults").props["int"],
+                     "<Property, name: int, type: int, value: 321>")
+
+        # A missing pickle is fine too
+        os.remove(edt_pickle)
+        edt = edtlib.load_edt("test.dts", [bindings_dir], io.StringIO(),
+                              edt_pickle=edt_pickle)
+        verify_streq(edt.get_node("/defaults").props["int"],
+                     "<Property, name: int, type: int, value: 321>")
+
+    #
+    # Test that modified bindings are picked up when reusing the binding index
+    #
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bindings_dir = os.path.join(tmp_dir, "test-bindings")
+        shutil.copytree("test-bindings", bindings_dir)
+
+        edt = edtlib.EDT("test.dts", [bindings_dir], io.StringIO())
+        verify_streq(edt.get_node("/defaults").props["int"],
+                     "<Property, name: int, type: int, value: 123>")
+
+        # Same size, so that only the modification time changes
+        defaults_path = os.path.join(bindings_dir, "defaults.yaml")
+        with open(defaults_path) as f:
+            contents = f.read()
+        with open(defaults_path, "w") as f:
+            f.write(contents.replace("default: 123", "default: 321"))
+        os.utime(defaults_path, ns=(0, 0))
+
+        edt = edtlib.EDT("test.dts", [bindings_dir], io.StringIO())
+        verify_streq(edt.get_node("/defaults").props["int"],
+                     "<Property, name: int, type: int, value: 321>")
+
     print("all tests passed")
 
 
@@ -6,7 +6,7 @@
 import csv
 import os
 
-from kconfiglib import standard_kconfig
+from kconfigcache import standard_kconfig
 
 
 def hardenconfig(kconf):
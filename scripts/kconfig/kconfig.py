@@ -5,7 +5,8 @@ import os
 import sys
 import textwrap
 
-from kconfiglib import Kconfig, BOOL, TRISTATE, TRI_TO_STR
+from kconfiglib import BOOL, TRISTATE, TRI_TO_STR
+from kconfigcache import load_kconfig
 
 
 # Warnings that won't be turned into errors (but that will still be printed),
@@ -29,8 +30,9 @@ def main():
     args = parse_args()
 
     print("Parsing Kconfig tree in " + args.kconfig_root)
-    kconf = Kconfig(args.kconfig_root, warn_to_stderr=False,
-                    suppress_traceback=True)
+    kconf = load_kconfig(args.kconfig_root,
+                         os.environ.get("KCONFIG_TREE_CACHE"),
+                         warn_to_stderr=False, suppress_traceback=True)
 
     # Warn for assignments to undefined symbols
     kconf.warn_assign_undef = True
@@ -0,0 +1,333 @@
+# Copyright (c) 2020 Nordic Semiconductor ASA
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Cache for parsed Kconfig trees.
+
+Parsing the Kconfig tree (tokenizing thousands of Kconfig files, building the
+menu tree and dependency graph, and running the sanity checks) is the slowest
+part of running the Kconfig scripts. load_kconfig() pickles the Kconfig
+instance right after parsing, and loads it back on later runs if none of the
+inputs to the parse changed:
+
+  - The contents of the sourced Kconfig files
+
+  - The directory entries of the directories in the source tree the Kconfig
+    files were sourced from and their parent directories, so that files newly
+    matched by wildcard 'source' statements are detected
+
+  - The environment variables referenced from the Kconfig files and read by
+    Kconfiglib
+
+  - The inputs of the Zephyr preprocessor functions in kconfigfunctions.py:
+    the devicetree, the generated devicetree configuration, the bindings, and
+    the environment variables they read (e.g. the list of shields)
+
+  - The source code of Kconfiglib and kconfigfunctions.py
+
+The cache only holds the most recent tree. If the ZEPHYR_KCONFIG_TREE_CACHE
+environment variable is set, the Zephyr build system points the
+KCONFIG_TREE_CACHE environment variable at a cache file in the build directory.
+
+Saving the tree makes the first configure of a build directory slower (by
+roughly 0.2 seconds for the Zephyr tree, and the cache file takes up about
+2.5 MB), while loading it saves about half of the parse time on the following
+configures and runs of the Kconfig tools. A build directory that is only
+configured once, like those of sanitycheck, gains nothing from it. That is why
+the cache is opt-in.
+"""
+
+import hashlib
+import importlib.util
+import os
+import pickle
+import sys
+import threading
+
+import kconfiglib
+
+# Bump when the format of the cache changes
+_CACHE_VERSION = 1
+
+# Environment variables read by Kconfiglib and kconfigfunctions.py, in
+# addition to the ones referenced from the Kconfig files
+_ENV_INPUTS = (
+    "srctree",
+    "CONFIG_",
+    "KCONFIG_AUTOHEADER_HEADER",
+    "KCONFIG_CONFIG_HEADER",
+    "KCONFIG_DOC_MODE",
+    "KCONFIG_FUNCTIONS",
+    "KCONFIG_STRICT",
+    "KCONFIG_WARN_UNDEF",
+    "KCONFIG_WARN_UNDEF_ASSIGN",
+    "DTS_POST_CPP",
+    "DTS_ROOT_BINDINGS",
+    "EDT_PICKLE",
+    "GENERATED_DTS_BOARD_CONF",
+    "SHIELD_AS_LIST",
+    "ZEPHYR_BASE",
+    "ZEPHYR_EDT_CACHE_DIR",
+)
+
+# The menu tree consists of long linked lists, which makes pickling recurse
+# deeply
+_RECURSION_LIMIT = 100000
+_STACK_SIZE = 256*1024*1024
+
+
+def load_kconfig(filename, cache_path, warn=True, warn_to_stderr=True,
+                 encoding="utf-8", suppress_traceback=False):
+    """
+    Returns kconfiglib.Kconfig(filename, warn, warn_to_stderr, encoding,
+    suppress_traceback).
+
+    If 'cache_path' is not None, the Kconfig instance is loaded from the cache
+    file at 'cache_path' if none of the inputs to the parse changed since it
+    was saved. Otherwise, the Kconfig files are parsed and the result saved to
+    'cache_path'.
+
+    Warnings generated while parsing are available in Kconfig.warnings either
+    way, and are printed to stderr if 'warn_to_stderr' is true, so that tools
+    that differ only in 'warn_to_stderr' (e.g. kconfig.py and menuconfig) can
+    share a cache file.
+    """
+    if cache_path is None:
+        return kconfiglib.Kconfig(filename, warn, warn_to_stderr, encoding,
+                                  suppress_traceback)
+
+    key = _cache_key(filename, warn, encoding)
+
+    kconf = _load(cache_path, key)
+    if not kconf:
+        kconf = kconfiglib.Kconfig(filename, warn, False, encoding,
+                                   suppress_traceback)
+        _save(cache_path, key, kconf)
+
+    kconf.warn_to_stderr = warn_to_stderr
+    if warn_to_stderr:
+        for warning in kconf.warnings:
+            print(warning, file=sys.stderr)
+
+    return kconf
+
+
+def standard_kconfig(description=None):
+    """
+    Like kconfiglib.standard_kconfig(), but loads the Kconfig instance with
+    load_kconfig(), using the cache file in $KCONFIG_TREE_CACHE, if set.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=description)
+
+    parser.add_argument(
+        "kconfig",
+        metavar="KCONFIG",
+        default="Kconfig",
+        nargs="?",
+        help="Top-level Kconfig file (default: Kconfig)")
+
+    return load_kconfig(parser.parse_args().kconfig,
+                        os.environ.get("KCONFIG_TREE_CACHE"),
+                        suppress_traceback=True)
+
+
+def _cache_key(filename, warn, encoding):
+    # Returns a string identifying the inputs to the parse that are known up
+    # front
+
+    return repr((
+        _CACHE_VERSION,
+        sys.version,
+        # Relative paths are looked up relative to the current directory if
+        # $srctree isn't set
+        os.environ.get("srctree") or os.getcwd(),
+        filename,
+        warn,
+        encoding,
+        _file_digest(kconfiglib.__file__),
+        _file_digest(_functions_path()),
+    ))
+
+
+def _load(cache_path, key):
+    # Returns the cached Kconfig instance, or None if the cache is missing or
+    # out of date
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, inputs = pickle.load(f)
+            if cached_key != key or _inputs(*inputs[0]) != inputs:
+                return None
+
+            kconf = _run_deep(pickle.load, f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or otherwise unusable. It gets overwritten.
+        return None
+
+    return kconf
+
+
+def _save(cache_path, key, kconf):
+    # Saves 'kconf' to the cache. The inputs are stored first, so that they
+    # can be checked without loading the Kconfig instance.
+
+    # The file object is closed, and only used while parsing
+    readline = kconf._readline
+    kconf._readline = None
+
+    try:
+        inputs = _inputs(sorted(kconf.env_vars), sorted(set(
+            os.path.join(kconf.srctree, fname)
+            for fname in kconf.kconfig_filenames)))
+
+        def write(f):
+            pickle.dump((key, inputs), f)
+            _run_deep(pickle.dump, kconf, f, pickle.HIGHEST_PROTOCOL)
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)),
+                    exist_ok=True)
+        _write_atomic(cache_path, write)
+    except Exception as e:
+        # Not fatal. The tree is just parsed again next time.
+        print("warning: failed to save Kconfig cache to '{}': {}"
+              .format(cache_path, e), file=sys.stderr)
+    finally:
+        kconf._readline = readline
+
+
+def _write_atomic(path, write):
+    # Calls write() with a file object for a temporary file and renames the
+    # file to 'path', so that concurrent builds never see a partial file
+
+    tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _inputs(env_vars, kconfig_paths):
+    # Returns the inputs to the parse that depend on what the Kconfig files
+    # referenced. The first element is the arguments, so that the inputs can
+    # be recomputed from a cached copy.
+
+    env = {var: os.environ.get(var)
+           for var in set(env_vars).union(_ENV_INPUTS)}
+
+    paths = list(kconfig_paths)
+
+    # Inputs of the devicetree functions in kconfigfunctions.py
+    for var in "DTS_POST_CPP", "GENERATED_DTS_BOARD_CONF":
+        if os.environ.get(var):
+            paths.append(os.environ[var])
+    for bindings_dir in os.environ.get("DTS_ROOT_BINDINGS", "").split("?"):
+        if bindings_dir:
+            for root, _, fnames in os.walk(bindings_dir):
+                paths.extend(os.path.join(root, fname)
+                             for fname in sorted(fnames)
+                             if fname.endswith(".yaml"))
+
+    # Wildcard 'source' statements only appear within the source tree.
+    # Directories outside it (e.g. the build directory, which has
+    # Kconfig.modules) gain entries all the time.
+    srctree = os.path.abspath(os.environ.get("srctree") or os.curdir)
+    dirs = set()
+    for path in kconfig_paths:
+        dirname = os.path.dirname(os.path.abspath(path))
+        for dirname in dirname, os.path.dirname(dirname):
+            if _within(dirname, srctree):
+                dirs.add(dirname)
+
+    return ((env_vars, kconfig_paths),
+            env,
+            {path: _file_digest(path) for path in paths},
+            {dirname: _dir_entries(dirname) for dirname in sorted(dirs)})
+
+
+def _functions_path():
+    # Returns the path to the module with the preprocessor functions, or None
+    # if there isn't one
+
+    try:
+        spec = importlib.util.find_spec(
+            os.getenv("KCONFIG_FUNCTIONS", "kconfigfunctions"))
+    except (ImportError, ValueError):
+        return None
+
+    return spec.origin if spec else None
+
+
+def _file_digest(path):
+    # Returns the SHA-256 digest of the file at 'path', or None if it can't be
+    # read
+
+    if path is None:
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _within(path, dirname):
+    # Returns True if the absolute path 'path' is 'dirname' or within it.
+    # Paths on different drives on Windows are never within each other.
+
+    try:
+        return os.path.commonpath((path, dirname)) == dirname
+    except ValueError:
+        return False
+
+
+def _dir_entries(path):
+    # Returns the sorted entries of the directory at 'path', or None if it
+    # can't be read
+
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return None
+
+
+def _run_deep(fn, *args):
+    # Runs fn(*args) in a thread with a large stack and a raised recursion
+    # limit, and returns the result. Exceptions are re-raised.
+
+    result = []
+    exception = []
+
+    def run():
+        try:
+            result.append(fn(*args))
+        except BaseException as e:
+            exception.append(e)
+
+    old_limit = sys.getrecursionlimit()
+    old_stack_size = threading.stack_size(_STACK_SIZE)
+    sys.setrecursionlimit(_RECURSION_LIMIT)
+    try:
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(old_stack_size)
+        sys.setrecursionlimit(old_limit)
+
+    if exception:
+        raise exception[0]
+
+    return result[0]
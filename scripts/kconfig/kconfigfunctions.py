@@ -24,7 +24,10 @@ if not doc_mode:
 
     # if a board port doesn't use DTS than these might not be set
     if os.path.isfile(DTS_POST_CPP) and BINDINGS_DIRS is not None:
-        edt = edtlib.EDT(DTS_POST_CPP, BINDINGS_DIRS.split("?"))
+        # Use the EDT saved by gen_defines.py if it's up to date
+        edt = edtlib.load_edt(DTS_POST_CPP, BINDINGS_DIRS.split("?"),
+                              cache_dir=os.environ.get("ZEPHYR_EDT_CACHE_DIR"),
+                              edt_pickle=os.environ.get("EDT_PICKLE"))
     else:
         edt = None
 
@@ -328,11 +331,7 @@ def dt_compat_enabled(kconf, _, compat):
     if doc_mode or edt is None:
         return "n"
 
-    for node in edt.nodes:
-        if compat in node.compats and node.enabled:
-            return "y"
-
-    return "n"
+    return "y" if compat in edt.compat2enabled else "n"
 
 
 def shields_list_contains(kconf, _, shield):
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Microbenchmark for the QEMUHandler console reader
+
+Replays a recorded handler.log through a pipe, the same way QEMU output
+arrives through the QEMU FIFO, and consumes it with both the old
+byte-at-a-time reader and the chunked ConsoleReader. Every line is passed
+to a ztest harness, like sanitycheck does.
+
+Usage:
+    python3 scripts/sanity_chk/bench_console_reader.py sanity-out/.../handler.log
+"""
+
+import argparse
+import os
+import select
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sanity_chk import harness
+from sanity_chk.console_reader import ConsoleReader
+
+READ_SIZE = 4096
+
+
+def replay(data, write_fd):
+    # Writes 'data' to the pipe in small pieces, roughly like a console
+    # would, then closes the write end to signal EOF
+    with os.fdopen(write_fd, "wb", buffering=0) as out_fp:
+        for i in range(0, len(data), 512):
+            out_fp.write(data[i:i + 512])
+
+
+def bytewise_reader(in_fp, h):
+    # The reader QEMUHandler used before ConsoleReader. The original
+    # failed the test on any multi-byte UTF-8 character, since it decoded one
+    # byte at a time; replace those here so that the whole log is consumed.
+
+    p = select.poll()
+    p.register(in_fp, select.POLLIN)
+    n_lines = 0
+    line = ""
+    while p.poll(1000):
+        c = in_fp.read(1).decode("utf-8", "replace")
+        if c == "":
+            break
+        line = line + c
+        if c != "\n":
+            continue
+
+        h.handle(line.strip())
+        n_lines += 1
+        line = ""
+
+    return n_lines
+
+
+def chunked_reader(in_fp, h):
+    # The reader QEMUHandler._monitor() uses now, which waits for the FIFO
+    # on the handler event loop instead of with poll()
+
+    p = select.poll()
+    p.register(in_fp, select.POLLIN)
+    n_lines = 0
+    reader = ConsoleReader()
+    while p.poll(1000):
+        data = in_fp.read(READ_SIZE)
+        if not data:
+            break
+        for line in reader.feed(data):
+            h.handle(line.strip())
+            n_lines += 1
+
+    return n_lines
+
+
+def run(reader_fn, data):
+    read_fd, write_fd = os.pipe()
+    h = harness.Test()
+    h.id = "bench"
+
+    t = threading.Thread(target=replay, args=(data, write_fd), daemon=True)
+    start = time.perf_counter()
+    t.start()
+    with os.fdopen(read_fd, "rb", buffering=0) as in_fp:
+        n_lines = reader_fn(in_fp, h)
+    elapsed = time.perf_counter() - start
+    t.join()
+
+    return n_lines, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="Recorded handler.log to replay")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="Concatenate the log this many times (default 1)")
+    args = parser.parse_args()
+
+    with open(args.log, "rb") as f:
+        data = f.read() * args.repeat
+
+    print("Replaying {} bytes".format(len(data)))
+    results = {}
+    for name, fn in (("bytewise", bytewise_reader),
+                     ("chunked", chunked_reader)):
+        n_lines, elapsed = run(fn, data)
+        results[name] = elapsed
+        print("{:<10} {:8d} lines {:10.3f} s".format(name, n_lines, elapsed))
+
+    print("speedup: {:.1f}x".format(results["bytewise"] / results["chunked"]))
+
+
+if __name__ == "__main__":
+    main()
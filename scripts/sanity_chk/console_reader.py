@@ -0,0 +1,63 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Zephyr's Sanity Check library
+#
+# Incremental splitting of raw console output into decoded lines.
+
+import codecs
+
+
+class ConsoleReader:
+    """Splits a stream of raw console bytes into lines of text
+
+    Data is fed in chunks of arbitrary size, e.g. whatever a single read()
+    on a FIFO or pipe returned after poll() woke up. Lines are only split
+    on '\\n', like the byte-at-a-time reader this replaces, and UTF-8
+    sequences cut in half by a chunk boundary are decoded correctly once
+    the rest of the sequence arrives.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._partial = ""
+        self.error = None
+
+    def feed(self, data):
+        """Feed a chunk of raw bytes to the reader
+
+        If the data isn't valid in the encoding, the lines before the first
+        invalid byte are still returned, 'error' is set to the
+        UnicodeDecodeError, and all later data is ignored.
+
+        @param data bytes read from the console, possibly empty
+        @return list of complete lines, each with its trailing '\\n'
+        """
+        if self.error:
+            return []
+
+        # Bytes of an incomplete sequence left over from the previous chunk
+        buffered = self._decoder.getstate()[0]
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError as e:
+            self.error = e
+            # The error position counts from the start of 'buffered'
+            self._decoder.reset()
+            text = self._decoder.decode((buffered + data)[:e.start])
+        text = self._partial + text
+
+        end = text.rfind("\n") + 1
+        if not end:
+            self._partial = text
+            return []
+
+        self._partial = text[end:]
+        lines = text[:end].split("\n")
+        # The last element is the empty string after the final '\n'
+        del lines[-1]
+        return [line + "\n" for line in lines]
+
+    @property
+    def partial(self):
+        """Text received after the last complete line"""
+        return self._partial
@@ -9,6 +9,7 @@ import os
 import copy
 import threading
 import re
+import weakref
 
 try:
     import ply.lex as lex
@@ -196,7 +197,92 @@ def ast_sym_int(ast, env):
             return int(v, 10)
     return 0
 
+class DTIndex:
+    """Sets of the aliases the dt_* functions look for in a devicetree
+
+    Built once per EDT object, so that evaluating a function is a set
+    lookup instead of a scan over all the nodes. Compatibles are looked up
+    in EDT.compat2enabled."""
+
+    def __init__(self, edt):
+        self.aliases = set()
+        # (matching compatible, alias) pairs
+        self.compat_aliases = set()
+
+        for node in edt.nodes:
+            if not node.enabled:
+                continue
+            self.aliases.update(node.aliases)
+            for alias in node.aliases:
+                self.compat_aliases.add((node.matching_compat, alias))
+
+dt_indexes = weakref.WeakKeyDictionary()
+dt_indexes_lock = threading.Lock()
+
+def dt_index(edt):
+    with dt_indexes_lock:
+        index = dt_indexes.get(edt)
+        if index is None:
+            index = dt_indexes[edt] = DTIndex(edt)
+    return index
+
+def ast_compile(ast):
+    """Turns 'ast' into a function that takes the environment and the EDT
+    and returns the value of the expression, like ast_expr(). Like there,
+    errors are raised when the function is called and evaluates the bad
+    part of the expression, not when it's compiled."""
+    op = ast[0]
+    if op == "not":
+        arg = ast_compile(ast[1])
+        return lambda env, edt: not arg(env, edt)
+    elif op == "or":
+        left, right = ast_compile(ast[1]), ast_compile(ast[2])
+        return lambda env, edt: left(env, edt) or right(env, edt)
+    elif op == "and":
+        left, right = ast_compile(ast[1]), ast_compile(ast[2])
+        return lambda env, edt: left(env, edt) and right(env, edt)
+
+    sym, arg = ast[1], ast[2] if len(ast) > 2 else None
+    if op == "==":
+        return lambda env, edt: ast_sym(sym, env) == arg
+    elif op == "!=":
+        return lambda env, edt: ast_sym(sym, env) != arg
+    elif op == ">":
+        # The grammar only allows numbers here, so int() can't fail
+        arg = int(arg)
+        return lambda env, edt: ast_sym_int(sym, env) > arg
+    elif op == "<":
+        arg = int(arg)
+        return lambda env, edt: ast_sym_int(sym, env) < arg
+    elif op == ">=":
+        arg = int(arg)
+        return lambda env, edt: ast_sym_int(sym, env) >= arg
+    elif op == "<=":
+        arg = int(arg)
+        return lambda env, edt: ast_sym_int(sym, env) <= arg
+    elif op == "in":
+        return lambda env, edt: ast_sym(sym, env) in arg
+    elif op == "exists":
+        return lambda env, edt: bool(ast_sym(sym, env))
+    elif op == ":":
+        # re caches compiled patterns
+        return lambda env, edt: bool(re.match(arg, ast_sym(sym, env)))
+    elif op == "dt_compat_enabled":
+        compat = sym[0]
+        return lambda env, edt: compat in edt.compat2enabled
+    elif op == "dt_alias_exists":
+        alias = sym[0]
+        return lambda env, edt: alias in dt_index(edt).aliases
+    elif op == "dt_compat_enabled_with_alias":
+        compat_alias = (sym[0], sym[1])
+        return lambda env, edt: compat_alias in dt_index(edt).compat_aliases
+
+    # Unknown function
+    return lambda env, edt: None
+
 def ast_expr(ast, env, edt):
+    """Evaluates 'ast' directly, without compiling it. parse() doesn't use
+    this, but ast_compile() is tested against it."""
     if ast[0] == "not":
         return not ast_expr(ast[1], env, edt)
     elif ast[0] == "or":
@@ -241,21 +327,28 @@ def ast_expr(ast, env, edt):
                 return True
         return False
 
+# Compiled expressions, by expression text
+compiled = {}
+
+# Like it's C counterpart, the parser's state machine is not thread-safe
 mutex = threading.Lock()
 
+def compile_expr(expr_text):
+    """Returns the function that evaluates the expression in 'expr_text'
+    with an environment and an EDT. Each expression is only parsed once."""
+    fn = compiled.get(expr_text)
+    if fn is None:
+        with mutex:
+            ast = parser.parse(expr_text)
+        fn = compiled[expr_text] = ast_compile(ast)
+    return fn
+
 def parse(expr_text, env, edt):
     """Given a text representation of an expression in our language,
     use the provided environment to determine whether the expression
     is true or false"""
 
-    # Like it's C counterpart, state machine is not thread-safe
-    mutex.acquire()
-    try:
-        ast = parser.parse(expr_text)
-    finally:
-        mutex.release()
-
-    return ast_expr(ast, env, edt)
+    return compile_expr(expr_text)(env, edt)
 
 # Just some test code
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Zephyr's Sanity Check library
+#
+# Extraction of gcov coverage data dumped on the console.
+
+import os
+
+DUMP_START = "GCOV_COVERAGE_DUMP_START"
+DUMP_END = "GCOV_COVERAGE_DUMP_END"
+
+# Number of hex digits decoded at a time. Must be even.
+HEX_CHUNK_SIZE = 1 << 16
+
+# Suffix of the files the data is written to before the dump is known to be
+# complete
+_TMP_SUFFIX = ".sanitycheck-tmp"
+
+
+def extract_gcda_files(log_file, keep_incomplete=False):
+    """Create the .gcda files from the coverage data dumped in a console log
+
+    The gcov dump looks like this, with one '*<path>' line per object file
+    and the contents of the .gcda file as hex digits:
+
+        GCOV_COVERAGE_DUMP_START
+        */path/to/file.gcda<0123abcd...
+        GCOV_COVERAGE_DUMP_END
+
+    The log is read line by line and each .gcda file is decoded and written
+    while scanning, so that the dump is never held in memory as a whole.
+
+    @param log_file path to the console log
+    @param keep_incomplete if True, the .gcda files are also created when the
+        log ends before the end of the dump. Otherwise, no files are created
+        for an incomplete dump.
+    @return (complete, gcda_files), where complete is False if the log has
+        the start of a dump but not its end, and gcda_files is the list of
+        .gcda files created
+    """
+    capturing = False
+    complete = False
+    # .gcda file -> file its data was written to
+    written = {}
+
+    try:
+        with open(log_file, "r", errors="replace") as fp:
+            for line in fp:
+                if not capturing:
+                    if DUMP_START in line:
+                        capturing = True
+                    continue
+
+                if DUMP_END in line:
+                    complete = True
+                    break
+
+                if not line.startswith("*"):
+                    continue
+
+                filename, sep, hex_dump = line[1:].partition("<")
+                if not sep:
+                    continue
+
+                # If kobject_hash is given for coverage gcovr fails, hence
+                # skipping it. Problem only in gcovr v4.1.
+                if "kobject_hash" in filename:
+                    try:
+                        os.remove(filename[:-4] + "gcno")
+                    except OSError:
+                        pass
+                    continue
+
+                out_file = filename if keep_incomplete else \
+                           filename + _TMP_SUFFIX
+                _write_hex(out_file, hex_dump.rstrip())
+                written[filename] = out_file
+
+        if not complete and not capturing:
+            # No coverage data in the log at all
+            complete = True
+
+        if complete:
+            for filename, out_file in written.items():
+                if out_file != filename:
+                    os.replace(out_file, filename)
+        elif not keep_incomplete:
+            for out_file in written.values():
+                os.remove(out_file)
+            written = {}
+    except BaseException:
+        for filename, out_file in written.items():
+            if out_file != filename:
+                try:
+                    os.remove(out_file)
+                except OSError:
+                    pass
+        raise
+
+    return complete, sorted(written)
+
+
+def _write_hex(filename, hex_dump):
+    # Decodes 'hex_dump' in chunks of HEX_CHUNK_SIZE digits and writes the
+    # result to 'filename'
+
+    with open(filename, "wb") as fp:
+        for i in range(0, len(hex_dump), HEX_CHUNK_SIZE):
+            fp.write(bytes.fromhex(hex_dump[i:i + HEX_CHUNK_SIZE]))
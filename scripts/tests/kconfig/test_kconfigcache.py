@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for scripts/kconfig/kconfigcache.py.'''
+
+import os
+import sys
+
+import pytest
+
+ZEPHYR_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                           "..", "..", ".."))
+
+sys.path.insert(0, os.path.join(ZEPHYR_BASE, "scripts", "kconfig"))
+
+import kconfigcache
+
+
+@pytest.fixture
+def srctree(tmp_path, monkeypatch):
+    '''Fixture which provides a source tree with a small Kconfig tree, and
+    sets up the environment the build system runs the Kconfig scripts in.'''
+    src = tmp_path / "src"
+    (src / "drivers" / "foo").mkdir(parents=True)
+    (src / "Kconfig").write_text(
+        'mainmenu "$(FOO_NAME)"\n'
+        'config FOO\n'
+        '\tbool "foo"\n'
+        'osource "drivers/*/Kconfig"\n')
+    (src / "drivers" / "foo" / "Kconfig").write_text(
+        'config FOO_DRIVER\n'
+        '\tbool "foo driver"\n')
+
+    monkeypatch.chdir(src)
+    monkeypatch.setenv("srctree", str(src))
+    monkeypatch.setenv("ZEPHYR_BASE", ZEPHYR_BASE)
+    # No devicetree for the Kconfig functions
+    monkeypatch.setenv("KCONFIG_DOC_MODE", "1")
+    monkeypatch.setenv("FOO_NAME", "Foo")
+    monkeypatch.setenv("SHIELD_AS_LIST", "")
+    return src
+
+
+@pytest.fixture
+def load(tmp_path, monkeypatch):
+    '''Fixture which provides a function that runs load_kconfig() with the
+    cache in <tmp_path>/cache and returns True if the Kconfig files were
+    parsed, and False if the tree came from the cache.'''
+    parses = []
+    save = kconfigcache._save
+
+    def counting_save(*args):
+        # Only called after parsing
+        parses.append(args)
+        save(*args)
+
+    monkeypatch.setattr(kconfigcache, "_save", counting_save)
+
+    def load():
+        n = len(parses)
+        kconf = kconfigcache.load_kconfig(
+            "Kconfig", str(tmp_path / "cache" / "tree.pickle"),
+            warn_to_stderr=False)
+        assert "FOO" in kconf.syms
+        return len(parses) > n
+
+    return load
+
+
+def test_unchanged(srctree, load):
+    assert load()
+    assert not load()
+
+
+def test_env_input(srctree, load, monkeypatch):
+    assert load()
+
+    # Read by shields_list_contains() in kconfigfunctions.py
+    monkeypatch.setenv("SHIELD_AS_LIST", "x_nucleo_iks01a1")
+    assert load()
+    assert not load()
+
+    # Referenced from the Kconfig files
+    monkeypatch.setenv("FOO_NAME", "Bar")
+    assert load()
+    assert not load()
+
+
+def test_sourced_file(srctree, load):
+    assert load()
+
+    (srctree / "drivers" / "foo" / "Kconfig").write_text(
+        'config FOO_DRIVER\n'
+        '\tbool "foo driver"\n'
+        '\tdefault y\n')
+    assert load()
+    assert not load()
+
+    # Newly matched by the wildcard 'osource'
+    (srctree / "drivers" / "bar").mkdir()
+    (srctree / "drivers" / "bar" / "Kconfig").write_text(
+        'config BAR_DRIVER\n'
+        '\tbool "bar driver"\n')
+    assert load()
+    assert not load()
+
+
+def test_different_drive(srctree, load, monkeypatch):
+    # On Windows, os.path.commonpath() raises ValueError for paths on
+    # different drives, e.g. when the build directory with Kconfig.modules
+    # isn't on the drive of the source tree
+    def commonpath(paths):
+        raise ValueError("Paths don't have the same drive")
+
+    monkeypatch.setattr(os.path, "commonpath", commonpath)
+    assert load()
+    assert not load()
@@ -0,0 +1,65 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Common fixtures for testing scripts/sanitycheck.'''
+
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ZEPHYR_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                           "..", "..", ".."))
+
+
+@pytest.fixture(scope="session")
+def sanitycheck():
+    '''Fixture which provides the scripts/sanitycheck script as a module.'''
+    os.environ.setdefault("ZEPHYR_BASE", ZEPHYR_BASE)
+
+    path = os.path.join(ZEPHYR_BASE, "scripts", "sanitycheck")
+    loader = importlib.machinery.SourceFileLoader("sanitycheck", path)
+    spec = importlib.util.spec_from_loader("sanitycheck", loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["sanitycheck"] = module
+    loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def options(sanitycheck, monkeypatch, tmp_path):
+    '''Fixture which sets the global options of sanitycheck like main()
+    does, for a run with --cache-dir <tmp_path>/cache.'''
+    monkeypatch.setattr("sys.argv", ["sanitycheck", "--cache-dir",
+                                     str(tmp_path / "cache")])
+    monkeypatch.setattr(sanitycheck, "options", sanitycheck.parse_arguments())
+    return sanitycheck.options
+
+
+@pytest.fixture
+def instance(sanitycheck, tmp_path):
+    '''Fixture which provides a TestInstance, for native_posix_64, of a
+    testcase that is filtered out unless CONFIG_FOO is enabled.'''
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "testcase.yaml").write_text(
+        "tests:\n  test.filter:\n    filter: CONFIG_FOO\n")
+    (app_dir / "prj.conf").write_text("")
+
+    testcase = sanitycheck.TestCase()
+    testcase.name = "test.filter"
+    testcase.source_dir = str(app_dir)
+    testcase.yamlfile = str(app_dir / "testcase.yaml")
+    testcase.tc_filter = "CONFIG_FOO"
+    testcase.extra_args = []
+    testcase.extra_configs = []
+
+    platform = sanitycheck.Platform()
+    platform.load(os.path.join(ZEPHYR_BASE, "boards", "posix",
+                               "native_posix", "native_posix_64.yaml"))
+
+    instance = sanitycheck.TestInstance(testcase, platform,
+                                        str(tmp_path / "out"))
+    instance.create_overlay(platform)
+    return instance
@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the selection of test configurations by
+TestSuite.apply_filters() in scripts/sanitycheck.'''
+
+import pytest
+
+# name: (arch, ram, flash, supported, ignore_tags, toolchains, env_satisfied)
+PLATFORMS = {
+    "arm_big": ("arm", 64, 256, {"gpio", "spi"}, ["net"], ["zephyr"], True),
+    "arm_small": ("arm", 16, 64, {"gpio"}, [], ["zephyr"], True),
+    "x86_big": ("x86", 256, 1024, {"spi"}, [], ["zephyr"], True),
+    "x86_other": ("x86", 256, 1024, {"gpio", "spi"}, [], ["llvm"], True),
+    "riscv_env": ("riscv", 256, 1024, set(), [], ["zephyr"], False),
+    "unit_testing": ("unit", 128, 512, set(), [], [], True),
+}
+
+# name: attributes that differ from the defaults
+TESTCASES = {
+    "test.all": {},
+    "test.whitelist": {"platform_whitelist": {"arm_big", "x86_big"}},
+    "test.exclude": {"platform_exclude": {"arm_big"},
+                     "arch_exclude": {"x86"}},
+    "test.arch": {"arch_whitelist": {"arm", "riscv"}},
+    "test.depends": {"depends_on": {"gpio", "spi"}},
+    "test.net": {"tags": {"net"}},
+    "test.ram": {"min_ram": 32},
+    "test.flash": {"min_flash": 512},
+    "test.skip": {"skip": True},
+    "test.toolchain": {"toolchain_whitelist": {"llvm"}},
+    "test.unit": {"type": "unit"},
+}
+
+
+def reason(tc, plat, kwargs):
+    # Returns the reason the pair is discarded, or None if it's selected,
+    # by checking the filters one by one on the pair (before PlatformIndex)
+
+    arch_filter = kwargs.get("arch")
+    tag_filter = kwargs.get("tag")
+    exclude_tag = kwargs.get("exclude_tag")
+
+    if tc.skip:
+        return "Skip filter"
+    if tag_filter and not tc.tags.intersection(tag_filter):
+        return "Command line testcase tag filter"
+    if exclude_tag and tc.tags.intersection(exclude_tag):
+        return "Command line testcase exclude filter"
+    if arch_filter and plat.arch not in arch_filter:
+        return "Command line testcase arch filter"
+    if tc.arch_whitelist and plat.arch not in tc.arch_whitelist:
+        return "Not in test case arch whitelist"
+    if tc.arch_exclude and plat.arch in tc.arch_exclude:
+        return "In test case arch exclude"
+    if tc.platform_exclude and plat.name in tc.platform_exclude:
+        return "In test case platform exclude"
+    if tc.platform_whitelist and plat.name not in tc.platform_whitelist:
+        return "Not in testcase platform whitelist"
+    if tc.toolchain_whitelist and "zephyr" not in tc.toolchain_whitelist:
+        return "Not in testcase toolchain whitelist"
+    if not plat.env_satisfied:
+        return "Environment ({}) not satisfied".format(", ".join(plat.env))
+    if "zephyr" not in plat.supported_toolchains and tc.type != "unit":
+        return "Not supported by the toolchain"
+    if plat.ram < tc.min_ram:
+        return "Not enough RAM"
+    if tc.depends_on and not tc.depends_on <= plat.supported:
+        return "No hardware support"
+    if plat.flash < tc.min_flash:
+        return "Not enough FLASH"
+    if set(plat.ignore_tags) & tc.tags:
+        return "Excluded tags per platform"
+    return None
+
+
+@pytest.fixture
+def suite(sanitycheck, monkeypatch, tmp_path):
+    '''Fixture which provides a TestSuite with PLATFORMS and TESTCASES.'''
+    monkeypatch.setenv("ZEPHYR_TOOLCHAIN_VARIANT", "zephyr")
+
+    suite = sanitycheck.TestSuite([], [], str(tmp_path / "out"))
+
+    suite.platforms = []
+    for name, (arch, ram, flash, supported, ignore_tags, toolchains,
+               env_satisfied) in PLATFORMS.items():
+        plat = sanitycheck.Platform()
+        plat.name = name
+        plat.arch = arch
+        plat.ram = ram
+        plat.flash = flash
+        plat.supported = supported
+        plat.ignore_tags = ignore_tags
+        plat.supported_toolchains = toolchains
+        plat.env = ["RISCV_ENV"]
+        plat.env_satisfied = env_satisfied
+        suite.platforms.append(plat)
+
+    suite.testcases = {}
+    for name, attrs in TESTCASES.items():
+        tc = sanitycheck.TestCase()
+        tc.name = name
+        tc.type = "integration"
+        tc.skip = False
+        tc.min_ram = 8
+        tc.min_flash = 32
+        tc.extra_configs = []
+        for attr in ("tags", "depends_on", "arch_whitelist", "arch_exclude",
+                     "platform_exclude", "platform_whitelist",
+                     "toolchain_exclude", "toolchain_whitelist"):
+            setattr(tc, attr, set())
+        for attr, value in attrs.items():
+            setattr(tc, attr, value)
+        suite.testcases[name] = tc
+
+    return suite
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"all": True},
+    {"all": True, "arch": ["arm", "riscv"]},
+    {"all": True, "exclude_tag": ["net"]},
+    {"all": True, "tag": ["net"]},
+])
+def test_apply_filters(suite, kwargs):
+    expected_selected = []
+    expected_discards = {}
+    for tc in suite.testcases.values():
+        for plat in suite.platforms:
+            if (plat.arch == "unit") != (tc.type == "unit"):
+                # Discarded silently
+                continue
+
+            name = plat.name + "/" + tc.name
+            discard_reason = reason(tc, plat, kwargs)
+            if discard_reason:
+                expected_discards[name] = discard_reason
+            else:
+                expected_selected.append(name)
+
+    discards = suite.apply_filters(**kwargs)
+
+    assert list(suite.instances) == expected_selected
+    # The number of discards is known before explain() runs
+    assert len(discards) == len(expected_discards)
+    assert {instance.name: discard_reason
+            for instance, discard_reason in discards.items()} == \
+        expected_discards
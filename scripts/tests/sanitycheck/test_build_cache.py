@@ -0,0 +1,71 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the --cache-dir build cache of scripts/sanitycheck.'''
+
+import shutil
+
+
+def build(sanitycheck, instance, tmp_path, monkeypatch):
+    # Sets up the handler of 'instance' and fakes a native_posix build of it,
+    # which has both a zephyr.elf and a zephyr.exe, and was configured with
+    # the bindings in <tmp_path>/bindings. Returns the BuildCache.
+
+    suite = sanitycheck.TestSuite([], [], str(tmp_path / "out"))
+    sanitycheck.ProjectBuilder(suite, instance).setup_handler()
+
+    build_dir = tmp_path / "out" / instance.platform.name / \
+        instance.testcase.name
+    (build_dir / "zephyr").mkdir(parents=True)
+    (build_dir / "build.log").write_text("build log\n")
+    (build_dir / "zephyr" / "zephyr.elf").write_text("elf\n")
+    (build_dir / "zephyr" / "zephyr.exe").write_text("exe\n")
+
+    (tmp_path / "bindings").mkdir()
+    (tmp_path / "bindings" / "vnd,sensor.yaml").write_text(
+        "compatible: \"vnd,sensor\"\n")
+    (build_dir / "CMakeCache.txt").write_text(
+        "CACHED_DTS_ROOT_BINDINGS:INTERNAL={}\n"
+        .format(tmp_path / "bindings"))
+
+    # No Ninja or Make dependency information in the fake build
+    monkeypatch.setattr(sanitycheck.BuildCache, "_build_inputs",
+                        staticmethod(lambda build_dir: set()))
+
+    return sanitycheck.BuildCache(sanitycheck.options.cache_dir)
+
+
+def test_binary_stored(sanitycheck, options, instance, tmp_path,
+                       monkeypatch):
+    cache = build(sanitycheck, instance, tmp_path, monkeypatch)
+    key = cache.key(instance, [])
+    cache.put(key, instance)
+
+    shutil.rmtree(instance.build_dir)
+    assert cache.restore(key, instance)
+    with open(instance.handler.binary) as f:
+        assert f.read() == "exe\n"
+
+
+def test_missing_binary(sanitycheck, options, instance, tmp_path,
+                       monkeypatch):
+    cache = build(sanitycheck, instance, tmp_path, monkeypatch)
+    key = cache.key(instance, [])
+
+    (tmp_path / "out" / instance.platform.name / instance.testcase.name /
+     "zephyr" / "zephyr.exe").unlink()
+    cache.put(key, instance)
+
+    assert not cache.restore(key, instance)
+
+
+def test_binding_change(sanitycheck, options, instance, tmp_path,
+                        monkeypatch):
+    cache = build(sanitycheck, instance, tmp_path, monkeypatch)
+    key = cache.key(instance, [])
+    cache.put(key, instance)
+
+    # The devicetree header generated at configure time would be different,
+    # so the binary can't be restored
+    (tmp_path / "bindings" / "vnd,sensor.yaml").write_text(
+        "compatible: \"vnd,sensor\"\ninclude: base.yaml\n")
+    assert not cache.restore(key, instance)
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for scripts/sanity_chk/console_reader.py.'''
+
+import os
+import sys
+
+from conftest import ZEPHYR_BASE
+
+sys.path.insert(0, os.path.join(ZEPHYR_BASE, "scripts"))
+
+from sanity_chk.console_reader import ConsoleReader
+
+
+def test_split_sequence():
+    reader = ConsoleReader()
+    data = "café ok\nnext\n".encode("utf-8")
+
+    # Split in the middle of the two-byte UTF-8 sequence for 'é'
+    assert reader.feed(data[:4]) == []
+    assert reader.feed(data[4:]) == ["café ok\n", "next\n"]
+    assert reader.error is None
+
+
+def test_invalid_byte():
+    reader = ConsoleReader()
+
+    # The lines before the invalid byte in the same chunk are returned
+    assert reader.feed(b"one\ntwo\nthr\xffee\nfour\n") == ["one\n", "two\n"]
+    assert isinstance(reader.error, UnicodeDecodeError)
+    assert reader.feed(b"five\n") == []
+
+
+def test_invalid_after_split_sequence():
+    reader = ConsoleReader()
+
+    # Start of 'é', then a byte that can't continue it
+    assert reader.feed(b"one\ncaf\xc3") == ["one\n"]
+    assert reader.feed(b"\nignored\n") == []
+    assert reader.partial == "caf"
+    assert isinstance(reader.error, UnicodeDecodeError)
+
+
+def test_invalid_after_split_line():
+    reader = ConsoleReader()
+
+    assert reader.feed(b"par") == []
+    assert reader.feed(b"tial\n\xe9\n") == ["partial\n"]
+    assert isinstance(reader.error, UnicodeDecodeError)
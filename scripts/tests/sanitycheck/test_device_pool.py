@@ -0,0 +1,26 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the --device-testing DevicePool of scripts/sanitycheck.'''
+
+
+def test_deferred_run(sanitycheck):
+    pool = sanitycheck.DevicePool([
+        {"platform": "frdm_k64f", "serial": "/dev/ttyACM0", "counter": 0}])
+
+    first = {"op": "run", "test": None}
+    second = {"op": "run", "test": None}
+
+    # The only device is promised to the first operation, so the second one
+    # is held back
+    assert not pool.defer("frdm_k64f", first)
+    assert pool.defer("frdm_k64f", second)
+    device = pool.acquire("frdm_k64f")
+    assert device["counter"] == 1
+
+    # Releasing the device queues the second operation again, which must
+    # now be dispatched instead of being held back once more
+    pool.release(device)
+    assert sanitycheck.pipeline.get_nowait() is second
+    assert not pool.defer("frdm_k64f", second)
+    assert pool.acquire("frdm_k64f") is device
+    assert pool.promised["frdm_k64f"] == 0
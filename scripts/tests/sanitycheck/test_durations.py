@@ -0,0 +1,26 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the durations database of scripts/sanitycheck.'''
+
+
+def test_durations(sanitycheck, instance, tmp_path):
+    path = tmp_path / "sanitycheck.db"
+
+    # Runs that don't measure anything (e.g. --list-tests) don't create the
+    # database
+    durations = sanitycheck.DurationHistory(str(path))
+    durations.update([instance])
+    assert not path.exists()
+    assert durations.predict(instance) is None
+
+    instance.metrics["build_time"] = 10.0
+    durations.update([instance])
+    assert path.exists()
+
+    # Later runs are averaged with the earlier ones
+    durations = sanitycheck.DurationHistory(str(path))
+    assert durations.predict(instance) == 10.0
+
+    instance.metrics["build_time"] = 20.0
+    durations.update([instance])
+    assert sanitycheck.DurationHistory(str(path)).predict(instance) == 15.0
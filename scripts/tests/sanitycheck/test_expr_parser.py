@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the filter expressions of scripts/sanitycheck, which parse()
+compiles, against the ast_expr() interpreter.'''
+
+import io
+
+import pytest
+
+DTS = '''
+/dts-v1/;
+
+/ {
+	aliases {
+		led0 = &led0;
+		led1 = &led1;
+		off = &off;
+	};
+
+	led0: led-0 {
+		compatible = "vnd,led";
+	};
+
+	led1: led-1 {
+		compatible = "vnd,other", "vnd,led";
+	};
+
+	off: off {
+		compatible = "vnd,off";
+		status = "disabled";
+	};
+};
+'''
+
+EXPRS = [
+    # Short-circuited operands that raise when evaluated
+    'FOO or BAR : "("',
+    'BAR and BAR : "("',
+    'FOO or NUM > 1',
+    'BAR and NUM > 1',
+    'FOO and (BAR or HEX >= 0x10)',
+    # Operators
+    'FOO == "1"',
+    'FOO != "1"',
+    'HEX > 0x100 or HEX <= 256',
+    'HEX >= 256 and HEX < 0x101',
+    'FOO in ["0", "1"]',
+    'BAR',
+    'not BAR',
+    'FOO : "[0-9]+"',
+    # The dt_* predicates
+    'dt_compat_enabled("vnd,led")',
+    'dt_compat_enabled("vnd,other")',
+    'dt_compat_enabled("vnd,off")',
+    'dt_compat_enabled("vnd,missing")',
+    'dt_alias_exists("led0")',
+    'dt_alias_exists("off")',
+    'dt_alias_exists("missing")',
+    'dt_compat_enabled_with_alias("vnd,led", "led0")',
+    'dt_compat_enabled_with_alias("vnd,led", "led1")',
+    'dt_compat_enabled_with_alias("vnd,other", "led1")',
+    'dt_compat_enabled_with_alias("vnd,off", "off")',
+    'dt_compat_enabled_with_alias("vnd,led", "off")',
+    'FOO and dt_compat_enabled("vnd,led") and not dt_alias_exists("off")',
+]
+
+
+@pytest.fixture(scope="module")
+def edt(sanitycheck, tmp_path_factory):
+    '''Fixture which provides the EDT of DTS.'''
+    import edtlib
+
+    tmp_path = tmp_path_factory.mktemp("dts")
+    (tmp_path / "test.dts").write_text(DTS)
+    (tmp_path / "bindings").mkdir()
+    for compat in "vnd,led", "vnd,other", "vnd,off":
+        (tmp_path / "bindings" / (compat + ".yaml")).write_text(
+            'description: Test\ncompatible: "{}"\n'.format(compat))
+
+    return edtlib.EDT(str(tmp_path / "test.dts"),
+                      [str(tmp_path / "bindings")], io.StringIO())
+
+
+@pytest.mark.parametrize("expr", EXPRS)
+def test_parse(sanitycheck, edt, expr):
+    expr_parser = sanitycheck.expr_parser
+    env = {"FOO": "1", "NUM": "x", "HEX": "0x100"}
+
+    expected = expr_parser.ast_expr(expr_parser.parser.parse(expr), env, edt)
+    assert expr_parser.parse(expr, env, edt) == expected
+    # Again, with the compiled expression and the dt_* index
+    assert expr_parser.parse(expr, env, edt) == expected
+
+
+def test_parse_errors(sanitycheck, edt):
+    # Errors are raised by the evaluation of the bad operand, like before
+    # expressions were compiled
+    expr_parser = sanitycheck.expr_parser
+    env = {"FOO": "1", "NUM": "x"}
+
+    for expr in 'FOO and BAR : "("', 'FOO and NUM > 1':
+        with pytest.raises(Exception) as ast_expr_error:
+            expr_parser.ast_expr(expr_parser.parser.parse(expr), env, edt)
+        with pytest.raises(Exception) as parse_error:
+            expr_parser.parse(expr, env, edt)
+        assert parse_error.type is ast_expr_error.type
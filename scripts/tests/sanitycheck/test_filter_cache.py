@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the --cache-dir filter cache of scripts/sanitycheck.'''
+
+import os
+
+
+def configure(sanitycheck, suite, instance, monkeypatch, config):
+    # Runs the "cmake" step for 'instance', with a CMake configure that
+    # writes 'config' to zephyr/.config. The configure reads the bindings in
+    # <tmp_path>/bindings and is rerun by CMake if <tmp_path>/module.cmake
+    # changes. Returns (<number of configures>, <next pipeline operation>).
+
+    configures = []
+    tmp_dir = os.path.dirname(instance.testcase.source_dir)
+
+    def run_cmake(self, args=[]):
+        configures.append(args)
+        zephyr_dir = os.path.join(self.build_dir, "zephyr")
+        os.makedirs(zephyr_dir, exist_ok=True)
+        with open(os.path.join(zephyr_dir, ".config"), "w") as f:
+            f.write(config)
+        with open(os.path.join(self.build_dir, "CMakeCache.txt"), "w") as f:
+            f.write("CACHED_DTS_ROOT_BINDINGS:INTERNAL={}\n"
+                    .format(os.path.join(tmp_dir, "bindings")))
+        with open(os.path.join(self.build_dir, "build.ninja"), "w") as f:
+            f.write("build build.ninja: RERUN_CMAKE | {} $\n"
+                    "    CMakeCache.txt\n"
+                    .format(os.path.join(tmp_dir, "module.cmake")))
+        return {"msg": "configured", "filter": self.parse_generated()}
+
+    monkeypatch.setattr(sanitycheck.ProjectBuilder, "run_cmake", run_cmake)
+
+    instance.status = None
+    sanitycheck.ProjectBuilder(suite, instance).process({"op": "cmake"})
+
+    return len(configures), sanitycheck.pipeline.get_nowait()["op"]
+
+
+def test_filter_cache(sanitycheck, options, instance, monkeypatch, tmp_path):
+    suite = sanitycheck.TestSuite([], [], str(tmp_path / "out"))
+    suite.filter_cache = sanitycheck.FilterCache(options.cache_dir)
+
+    (tmp_path / "bindings" / "sensor").mkdir(parents=True)
+    binding = tmp_path / "bindings" / "sensor" / "vnd,sensor.yaml"
+    binding.write_text("compatible: \"vnd,sensor\"\n")
+    (tmp_path / "module.cmake").write_text("")
+
+    def filtered_by_cache():
+        # Configures 'instance' twice, checking that it's filtered out by
+        # the configure and then by the cached result
+        for expected in (1, "report"), (0, "report"):
+            assert configure(sanitycheck, suite, instance, monkeypatch,
+                             "") == expected
+            assert instance.status == "skipped" and \
+                instance.reason == "filter"
+
+    filtered_by_cache()
+
+    # Changing, adding, or removing a binding invalidates the cached result
+    binding.write_text("compatible: \"vnd,sensor\"\ninclude: base.yaml\n")
+    filtered_by_cache()
+
+    (tmp_path / "bindings" / "sensor" / "vnd,other.yaml").write_text("")
+    filtered_by_cache()
+
+    binding.unlink()
+    filtered_by_cache()
+
+    # So does changing a file CMake reruns the configure for
+    (tmp_path / "module.cmake").write_text("set(FOO 1)\n")
+    filtered_by_cache()
+
+    # Changing an input of the configure invalidates the cached result
+    (tmp_path / "app" / "prj.conf").write_text("CONFIG_FOO=y\n")
+    assert configure(sanitycheck, suite, instance, monkeypatch,
+                     "CONFIG_FOO=y\n") == (1, "build")
+
+    # Instances that aren't filtered out are always configured
+    assert configure(sanitycheck, suite, instance, monkeypatch,
+                     "CONFIG_FOO=y\n") == (1, "build")
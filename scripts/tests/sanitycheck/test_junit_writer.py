@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: Apache-2.0
+
+'''Tests for the JUnitWriter of scripts/sanitycheck.'''
+
+import io
+import xml.etree.ElementTree as ET
+
+
+def test_round_trip(sanitycheck):
+    message = 'a\tb\nc\r\nd "&<>" é'
+    text = "log\r\nline & <tag>\n"
+
+    f = io.BytesIO()
+    writer = sanitycheck.JUnitWriter(f, {"name": message, "tests": "1"})
+    testcase = ET.Element("testcase", classname="qemu_x86:test",
+                          name=message, time="1.000000")
+    failure = ET.SubElement(testcase, "failure", type="failure",
+                            message=message)
+    failure.text = text
+    ET.SubElement(testcase, "skipped", type="skipped", message="Skipped")
+    writer.add(testcase)
+    writer.close()
+
+    root = ET.fromstring(f.getvalue())
+    suite = root.find("testsuite")
+    assert suite.get("name") == message
+    assert suite.get("tests") == "1"
+
+    testcase = suite.find("testcase")
+    assert testcase.get("name") == message
+    assert testcase.find("failure").get("message") == message
+    assert testcase.find("failure").text == text
+    assert testcase.find("skipped").get("message") == "Skipped"
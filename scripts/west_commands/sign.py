@@ -296,9 +296,11 @@ class ImgtoolSigner(Signer):
             log.die("can't find DTS; expected:", dts)
         log.dbg('DTS file:', dts, level=log.VERBOSE_VERY)
 
-        # Parse the devicetree using bindings from cache.
+        # Parse the devicetree using bindings from cache, or load the
+        # devicetree parsed by gen_defines.py if it's up to date.
         try:
-            edt = edtlib.EDT(dts, bindings)
+            edt = edtlib.load_edt(dts, bindings,
+                                  edt_pickle=b / 'zephyr' / 'edt.pickle')
         except edtlib.EDTError as e:
             log.die("can't parse devicetree:", e)
 